@@ -0,0 +1,85 @@
+import threading
+import time
+
+# top-level account keys the sync needs besides the projected "data" fields
+ACCOUNT_KEYS = ("id", "lid_nummer", "data")
+
+
+class AccountsSnapshot:
+    """
+    Holds the last /api/accounts.json payload so everything that needs the account list
+    (target tree, pilot matching, post-sync refresh) shares one download.
+    The snapshot is re-downloaded when older than max_age seconds, or after invalidate().
+
+    Once project() has been given the data fields the mappings use, every record is cut
+    down to those fields; the full list of field names is kept in field_names.
+    Projection builds new dicts, so maps built from get() must be rebuilt afterwards.
+    """
+
+    def __init__(self, fetch, max_age=None):
+        self._fetch = fetch
+        self.max_age = max_age
+        self.fields: set[str] | None = None
+        self.field_names: list[str] | None = None
+        self._accounts = None
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns the list of account dicts, downloading it only if the snapshot is stale."""
+        with self._lock:
+            if not self._is_fresh():
+                accounts = self._fetch()
+                self.field_names = self._list_field_names(accounts)
+                if self.fields is not None:
+                    accounts = [self._project(account, self.fields) for account in accounts]
+                self._accounts = accounts
+                self._fetched_at = time.monotonic()
+            return self._accounts
+
+    def project(self, fields):
+        """
+        Keeps only the given data fields in every record (and in future downloads).
+        Returns True if the snapshot had to be dropped because it lacked some of them.
+        """
+        fields = set(fields)
+        with self._lock:
+            if fields == self.fields:
+                return False
+            if self.fields is not None and not fields <= self.fields:
+                # fields projected away earlier can only come back with a new download
+                self.fields = fields
+                self._accounts = None
+                self._fetched_at = None
+                return True
+            self.fields = fields
+            if self._accounts is not None:
+                self._accounts = [self._project(account, fields) for account in self._accounts]
+            return False
+
+    def invalidate(self):
+        """Forces the next get() to download fresh data, e.g. after we changed accounts on the server."""
+        with self._lock:
+            self._accounts = None
+            self._fetched_at = None
+
+    def _is_fresh(self):
+        if self._accounts is None:
+            return False
+        if self.max_age is None:
+            return True
+        return time.monotonic() - self._fetched_at < self.max_age
+
+    @staticmethod
+    def _project(account, fields):
+        projected = {key: account[key] for key in ACCOUNT_KEYS if key in account}
+        data = projected.get("data")
+        if isinstance(data, dict):
+            projected["data"] = {key: value for key, value in data.items() if key in fields}
+        return projected
+
+    @staticmethod
+    def _list_field_names(accounts):
+        first = accounts[0] if isinstance(accounts, list) and accounts else {}
+        data = first.get("data") if isinstance(first, dict) else None
+        return sorted(data.keys()) if isinstance(data, dict) else None
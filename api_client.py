@@ -1,118 +1,175 @@
-import requests
+import threading
+import time
+from urllib.parse import urlsplit
 from competency import Competency
 from assigned_competency import AssignedCompetency
+from accounts_snapshot import AccountsSnapshot
+from rate_limiter import RateLimiter
+from run_metrics import RunMetrics
 
 
 class ApiClient:
-    def __init__(self, config):
+    def __init__(self, config, metrics=None):
         self.config = config
+        self.metrics = metrics if metrics is not None else RunMetrics()
         self.base_url = self.config["server"].rstrip("/")
         self.headers = {"X-API-KEY": self.config["api_key"]}
+        self._session = None
+        self._session_lock = threading.Lock()
+        max_age = self.config.get("accounts_max_age_seconds", 900)
+        self.accounts_snapshot = AccountsSnapshot(self._download_accounts, float(max_age) if max_age is not None else None)
+        self.rate_limiter = RateLimiter.from_config(self.config, self._pool_size())
+
+    @property
+    def session(self):
+        """Created on the first API call, so requests isn't imported until it's needed."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        """
+        One keep-alive session shared by all calls (and all upload workers), so a sync
+        reuses a handful of TCP/TLS connections instead of opening one per request.
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=int(self.config.get("http_retries", 3)),
+            backoff_factor=float(self.config.get("http_backoff", 0.5)),
+            status_forcelist=(429, 500, 502, 503, 504),
+            # assign/revoke (POST) and account PUT set an absolute state on the server,
+            # so repeating them after a lost response is harmless
+            allowed_methods=frozenset({"GET", "PUT", "POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size(), max_retries=retry)
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _pool_size(self):
+        return max(int(self.config.get("http_pool_size", self.config.get("upload_concurrency", 1))), 1)
+
+    def _request(self, method, url, **kwargs):
+        """
+        Sends a request through the rate limiter and returns the decoded JSON body.
+        Retries (including 429/503 with Retry-After) happen inside the session.
+        """
+        endpoint = f"{method} {urlsplit(url).path}"
+        with self.rate_limiter.request(method, url) as call:
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=10, **kwargs)
+            except Exception:
+                self.metrics.record_request(endpoint, time.perf_counter() - start)
+                raise
+            seconds = time.perf_counter() - start
+            call.observe(response)
+        self.metrics.record_request(
+            endpoint, seconds, response.status_code,
+            len(response.request.body or b""), len(response.content), call.retried,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _download_accounts(self):
+        return self._request("GET", f"{self.base_url}/api/accounts.json")
 
     def load_account_leaves(self):
-        url = f"{self.base_url}/api/accounts.json"
         try:
-            resp = requests.get(url, headers=self.headers, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            first = data[0] if isinstance(data, list) and data else {}
-            acct_data = first.get("data", {})
-            if not isinstance(acct_data, dict):
+            self.accounts_snapshot.get()
+            if self.accounts_snapshot.field_names is None:
                 raise ValueError("'data' field not found in first element")
-            return sorted(acct_data.keys())
+            return self.accounts_snapshot.field_names
         except Exception as e:
             raise ConnectionError(f"Could not load accounts: {e}") from e
 
     def load_competencies_subtree(self):
         url = f"{self.base_url}/api/competencies.json"
-        tree = {}
-
         try:
-            resp = requests.get(url, headers=self.headers, timeout=10)
-            resp.raise_for_status()
-            curricula = resp.json()
-
-            for cur in curricula:
-                cat_branch = {}
-                if cur.get("is_dto"):
-                    continue
-                for cat in cur.get("categories", []):
-                    comps = [
-                        Competency(
-                            comp["name"],
-                            " / ".join(["Competencies", cur.get("name"), cat.get("name"), comp["name"]]),
-                            comp.get("id", None)
-                            )
-                        for comp in cat.get("competencies", [])
-                        if not comp.get("is_dto")
-                    ]
-                    if comps:
-                        cat_branch[cat["name"]] = comps
-
-                if cat_branch:
-                    name = cur.get("name")
-                    tree[name] = cat_branch
-
-            return tree
-
+            return self._parse_competencies_subtree(self._request("GET", url))
         except Exception as e:
             raise ConnectionError(f"Could not load competencies: {e}") from e
 
 
-    def fetch_accounts_map(self):
-        url = f"{self.base_url}/api/accounts.json"
+    def fetch_accounts_map(self, refresh=False):
+        """Membership number → account, from the shared snapshot (refresh=True forces a download)."""
+        if refresh:
+            self.accounts_snapshot.invalidate()
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            accounts = response.json()
-            # Return a map: membership_number (lid_nummer) → full account dict
-            return {int(acc['lid_nummer']): acc for acc in accounts}
+            return self._parse_accounts_map(self.accounts_snapshot.get())
         except Exception as e:
             raise ConnectionError(f"Failed to fetch accounts: {e}") from e
 
     def put_account_data(self, pilot_id, data_fields):
         url = f"{self.base_url}/api/accounts.json"
-        body = {
-            "id": pilot_id,
-            "data": data_fields
-        }
-        response = requests.put(url, json=body, headers=self.headers, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        return self._request("PUT", url, json=self._account_body(pilot_id, data_fields))
     
     def assign_competency(self, pilot_id, competency_id, date_assigned, date_valid_to):
         url = f"{self.base_url}/api/competencies/assign.json"
-        body = {
-            "user_id": pilot_id,
-            "id": competency_id,
-            "score": "assigned",
-            **{k: v for k, v in { # we add date_assigned and date_valid_to only if they are "truthy"
-                "date_assigned": date_assigned,
-                "date_valid_to": date_valid_to
-            }.items() if v}
-        }
-        response = requests.post(url, json=body, headers=self.headers, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        body = self._assign_body(pilot_id, competency_id, date_assigned, date_valid_to)
+        return self._request("POST", url, json=body)
     
     def revoke_competency(self, pilot_id, competency_id):
         url = f"{self.base_url}/api/competencies/revoke.json"
-        body = {
-            "user_id": pilot_id,
-            "id": competency_id
-        }
-        response = requests.post(url, json=body, headers=self.headers, timeout=10)
-        response.raise_for_status()
-        return response.json()
+        return self._request("POST", url, json=self._revoke_body(pilot_id, competency_id))
 
     def get_competencies_by_pilot(self, pilot_id):
         url = f"{self.base_url}/api/competencies/user.json?user_id={pilot_id}"
-        response = requests.get(url, headers=self.headers, timeout=10)
-        response.raise_for_status()
+        return self._parse_pilot_competencies(self._request("GET", url), pilot_id)
 
-        competencies_by_id = {}
+    # ----------- Payload helpers, shared with AsyncApiClient -----------
 
-        for item in response.json():
+    @staticmethod
+    def _parse_account_leaves(data):
+        first = data[0] if isinstance(data, list) and data else {}
+        acct_data = first.get("data", {})
+        if not isinstance(acct_data, dict):
+            raise ValueError("'data' field not found in first element")
+        return sorted(acct_data.keys())
+
+    @staticmethod
+    def _parse_competencies_subtree(curricula):
+        tree = {}
+        for cur in curricula:
+            cat_branch = {}
+            if cur.get("is_dto"):
+                continue
+            for cat in cur.get("categories", []):
+                comps = [
+                    Competency(
+                        comp["name"],
+                        " / ".join(["Competencies", cur.get("name"), cat.get("name"), comp["name"]]),
+                        comp.get("id", None)
+                        )
+                    for comp in cat.get("competencies", [])
+                    if not comp.get("is_dto")
+                ]
+                if comps:
+                    cat_branch[cat["name"]] = comps
+
+            if cat_branch:
+                name = cur.get("name")
+                tree[name] = cat_branch
+        return tree
+
+    @staticmethod
+    def _parse_accounts_map(accounts):
+        # Return a map: membership_number (lid_nummer) → full account dict
+        return {int(acc['lid_nummer']): acc for acc in accounts}
+
+    @staticmethod
+    def _parse_pilot_competencies(items, pilot_id):
+        competencies_by_id = {}
+        for item in items:
             comp_id = item["competency_id"]
             competencies_by_id[comp_id] = AssignedCompetency(
                 comp_id=comp_id,
@@ -120,5 +177,30 @@ class ApiClient:
                 date_valid_to=item.get("date_valid_to"),
                 pilot_id=pilot_id
             )
-
         return competencies_by_id
+
+    @staticmethod
+    def _account_body(pilot_id, data_fields):
+        return {
+            "id": pilot_id,
+            "data": data_fields
+        }
+
+    @staticmethod
+    def _assign_body(pilot_id, competency_id, date_assigned, date_valid_to):
+        return {
+            "user_id": pilot_id,
+            "id": competency_id,
+            "score": "assigned",
+            **{k: v for k, v in { # we add date_assigned and date_valid_to only if they are "truthy"
+                "date_assigned": date_assigned,
+                "date_valid_to": date_valid_to
+            }.items() if v}
+        }
+
+    @staticmethod
+    def _revoke_body(pilot_id, competency_id):
+        return {
+            "user_id": pilot_id,
+            "id": competency_id
+        }
@@ -1,4 +1,6 @@
 class AssignedCompetency:
+    __slots__ = ("id", "date_assigned", "date_valid_to", "pilot_id")
+
     def __init__(self, comp_id, date_assigned, date_valid_to, pilot_id):
         self.id = comp_id
         self.date_assigned = date_assigned
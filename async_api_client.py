@@ -0,0 +1,145 @@
+try:
+    import aiohttp
+except ModuleNotFoundError:
+    aiohttp = None
+import asyncio
+import json
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from api_client import ApiClient
+from rate_limiter import RateLimiter
+from run_metrics import RunMetrics
+
+
+class AsyncApiClient:
+    """
+    asyncio counterpart of ApiClient: same methods, same return values, but every call is a
+    coroutine sharing one aiohttp connection pool. Use it as an async context manager
+    (or call close()) so the pool is released on the event loop that created it.
+    Pass the ApiClient's rate_limiter to share its request rate cap and concurrency windows.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, config, metrics=None, rate_limiter=None):
+        if not aiohttp:
+            raise ImportError("The 'aiohttp' library is required for the asyncio sync mode.")
+        self.config = config
+        self.base_url = self.config["server"].rstrip("/")
+        self.headers = {"X-API-KEY": self.config["api_key"]}
+        self.retries = int(self.config.get("http_retries", 3))
+        self.backoff = float(self.config.get("http_backoff", 0.5))
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        self.rate_limiter = rate_limiter or RateLimiter.from_config(self.config, self._pool_size())
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=self._pool_size()),
+            )
+        return self._session
+
+    def _pool_size(self):
+        return max(int(self.config.get("http_pool_size", self.config.get("upload_concurrency", 1))), 1)
+
+    async def _request(self, method, url, **kwargs):
+        """
+        Sends a request and returns the decoded JSON body, retrying connection errors and
+        429/5xx responses with the same backoff policy as ApiClient.
+        Every attempt goes through the rate limiter; backoff waits don't hold a slot.
+        """
+        session = self._get_session()
+        endpoint = f"{method} {urlsplit(url).path}"
+        bytes_sent = len(json.dumps(kwargs["json"]).encode("utf-8")) if "json" in kwargs else 0
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.rate_limiter.request_async(method, url) as call:
+                    async with session.request(method, url, **kwargs) as response:
+                        call.observe_status(response.status)
+                        retry = response.status in self.RETRY_STATUSES and attempt < self.retries
+                        if retry:
+                            delay = self._retry_after(response.headers.get("Retry-After"))
+                        else:
+                            body = await response.read()
+                if not retry:
+                    self.metrics.record_request(
+                        endpoint, time.perf_counter() - start, response.status,
+                        bytes_sent * (attempt + 1), len(body), attempt,
+                    )
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.retries:
+                    self.metrics.record_request(endpoint, time.perf_counter() - start, None, bytes_sent * (attempt + 1), 0, attempt)
+                    raise
+                delay = None
+            await asyncio.sleep(delay if delay is not None else self.backoff * (2 ** attempt))
+
+    @staticmethod
+    def _retry_after(value):
+        if not value:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    async def load_account_leaves(self):
+        url = f"{self.base_url}/api/accounts.json"
+        try:
+            return ApiClient._parse_account_leaves(await self._request("GET", url))
+        except Exception as e:
+            raise ConnectionError(f"Could not load accounts: {e}") from e
+
+    async def load_competencies_subtree(self):
+        url = f"{self.base_url}/api/competencies.json"
+        try:
+            return ApiClient._parse_competencies_subtree(await self._request("GET", url))
+        except Exception as e:
+            raise ConnectionError(f"Could not load competencies: {e}") from e
+
+    async def fetch_accounts_map(self):
+        url = f"{self.base_url}/api/accounts.json"
+        try:
+            return ApiClient._parse_accounts_map(await self._request("GET", url))
+        except Exception as e:
+            raise ConnectionError(f"Failed to fetch accounts: {e}") from e
+
+    async def put_account_data(self, pilot_id, data_fields):
+        url = f"{self.base_url}/api/accounts.json"
+        return await self._request("PUT", url, json=ApiClient._account_body(pilot_id, data_fields))
+
+    async def assign_competency(self, pilot_id, competency_id, date_assigned, date_valid_to):
+        url = f"{self.base_url}/api/competencies/assign.json"
+        body = ApiClient._assign_body(pilot_id, competency_id, date_assigned, date_valid_to)
+        return await self._request("POST", url, json=body)
+
+    async def revoke_competency(self, pilot_id, competency_id):
+        url = f"{self.base_url}/api/competencies/revoke.json"
+        return await self._request("POST", url, json=ApiClient._revoke_body(pilot_id, competency_id))
+
+    async def get_competencies_by_pilot(self, pilot_id):
+        url = f"{self.base_url}/api/competencies/user.json"
+        items = await self._request("GET", url, params={"user_id": pilot_id})
+        return ApiClient._parse_pilot_competencies(items, pilot_id)
@@ -0,0 +1,194 @@
+"""
+End-to-end sync benchmark against the local mock server (benchmarks/mock_server.py).
+
+Generates an Aerolog-style export for a club of --pilots members, then for every
+--concurrency value runs SyncService.load_excel_data, a compare (check only) and an
+upload, and reports wall time, requests per second and requests per pilot per phase.
+
+    python benchmarks/bench_sync.py --pilots 500 --latency 0.02 --concurrency 1 4 8
+    python benchmarks/bench_sync.py --async-upload --json bench.json
+
+The server is reset before every run, so each upload starts from the same club.
+--json writes the results; --baseline compares against such a file and exits with 1 if a
+phase got slower than --max-slowdown times the baseline or needs more requests per pilot.
+
+    python benchmarks/bench_sync.py --json baseline.json
+    python benchmarks/bench_sync.py --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import config  # noqa: E402
+import mock_server  # noqa: E402
+from sync_service import SyncService  # noqa: E402
+
+EXTRA_ROW_TYPES = ("SPL LM S", "Unmapped qualification")
+
+
+def write_export(path, pilots, mappings_path, seed=1):
+    """Writes an Aerolog-style export (4 title rows, header on row 5) for members 1001..1000+pilots."""
+    from openpyxl import Workbook
+
+    with open(mappings_path, "r", encoding="utf-8") as f:
+        sources = {pair["source"].split(" / ")[0] for pair in json.load(f)}
+    row_types = sorted(sources - {"Current DateTime", "App Name (QualsSync)"}) + list(EXTRA_ROW_TYPES)
+
+    rnd = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for i in range(4):
+        sheet.append([f"Qualifications report line {i + 1}"])
+    sheet.append(["ACCOUNT", "NAME", "TYPE", "DETAIL", "DATE FROM", "DATE TO"])
+    start = datetime(2015, 1, 1)
+    for pilot_id in range(1, pilots + 1):
+        membership = mock_server.FIRST_MEMBERSHIP + pilot_id
+        for row_type in rnd.sample(row_types, rnd.randint(1, min(6, len(row_types)))):
+            date_from = start + timedelta(days=rnd.randint(0, 3500))
+            date_to = date_from + timedelta(days=rnd.randint(100, 2000)) if rnd.random() < 0.6 else None
+            sheet.append([membership, f"Pilot {membership}", row_type, "", date_from, date_to])
+    workbook.save(path)
+
+
+def timed_phase(app, pilots, action):
+    """Runs action() and returns its wall time and the requests the server saw meanwhile."""
+    requests_before = sum(app.requests.values())
+    errors_before = sum(app.errors.values())
+    start = time.perf_counter()
+    action()
+    seconds = time.perf_counter() - start
+    requests = sum(app.requests.values()) - requests_before
+    return {
+        "seconds": round(seconds, 3),
+        "requests": requests,
+        "injected_errors": sum(app.errors.values()) - errors_before,
+        "requests_per_second": round(requests / seconds, 1) if seconds else None,
+        "requests_per_pilot": round(requests / pilots, 2) if pilots else None,
+    }
+
+
+def run_once(app, server_url, export_path, mappings_path, concurrency, async_upload, pilots):
+    app.reset()
+    service = SyncService({
+        "server": server_url,
+        "api_key": "benchmark",
+        "upload_concurrency": concurrency,
+        "async_upload": async_upload,
+        "excel_cache": False,
+        "run_report": False,
+        # every run starts from a reset club: no resuming, no local copy of the mock server
+        "sync_journal": False,
+        "state_mirror": False,
+    })
+    service.load_mappings(mappings_path)
+    errors = []
+
+    def log(message, tag=None):
+        if tag == "error":
+            errors.append(message)
+
+    def upload(check_only):
+        service.upload_data(check_only, log)
+
+    phases = {
+        "load_excel": timed_phase(app, pilots, lambda: service.load_excel_data(export_path)),
+        "compare": timed_phase(app, pilots, lambda: upload(True)),
+        "upload": timed_phase(app, pilots, lambda: upload(False)),
+    }
+    return {"concurrency": concurrency, "async_upload": async_upload, "phases": phases, "logged_errors": len(errors)}
+
+
+def print_results(results):
+    print(f"{'concurrency':>11}  {'phase':<10} {'seconds':>8} {'requests':>9} {'req/s':>8} {'req/pilot':>9} {'errors':>6}")
+    for result in results:
+        label = f"{result['concurrency']}{' async' if result['async_upload'] else ''}"
+        for phase, stats in result["phases"].items():
+            print(
+                f"{label:>11}  {phase:<10} {stats['seconds']:>8.3f} {stats['requests']:>9} "
+                f"{stats['requests_per_second'] or 0:>8.1f} {stats['requests_per_pilot'] or 0:>9.2f} "
+                f"{stats['injected_errors']:>6}"
+            )
+        if result["logged_errors"]:
+            print(f"{'':>11}  ({result['logged_errors']} operations failed after retries)")
+
+
+def compare_with_baseline(results, baseline, max_slowdown):
+    """Returns a message for every phase that regressed against the baseline results."""
+    previous = {(r["concurrency"], r["async_upload"]): r["phases"] for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        label = f"concurrency {result['concurrency']}{' async' if result['async_upload'] else ''}"
+        for phase, stats in result["phases"].items():
+            before = previous.get((result["concurrency"], result["async_upload"]), {}).get(phase)
+            if before is None:
+                continue
+            if stats["seconds"] > before["seconds"] * max_slowdown:
+                regressions.append(f"{label} {phase}: {stats['seconds']:.3f}s (baseline {before['seconds']:.3f}s)")
+            if (stats["requests_per_pilot"] or 0) > (before["requests_per_pilot"] or 0):
+                regressions.append(
+                    f"{label} {phase}: {stats['requests_per_pilot']} requests/pilot "
+                    f"(baseline {before['requests_per_pilot']})"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark a full sync against the local mock server.")
+    parser.add_argument("--pilots", type=int, default=200, help="club size (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds added to every request (default: %(default)s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="upload_concurrency values to run")
+    parser.add_argument("--async-upload", action="store_true", help="upload with async_upload (needs aiohttp)")
+    parser.add_argument("--mappings", default=mock_server.DEFAULT_MAPPINGS, help="mapping file (default: mappings-live.json)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="results JSON of an earlier run to compare with")
+    parser.add_argument("--max-slowdown", type=float, default=1.25,
+                        help="allowed wall time ratio against --baseline (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    app = mock_server.MockGlidingApp(args.pilots, args.latency, args.error_rate, args.seed, args.mappings)
+    server = mock_server.start(app)
+    server_url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            config.CONFIG_FILE = os.path.join(tmp, "config.json")  # nothing is written next to the real config
+            export_path = os.path.join(tmp, "export.xlsx")
+            write_export(export_path, args.pilots, args.mappings, args.seed)
+            results = [
+                run_once(app, server_url, export_path, args.mappings, concurrency, args.async_upload, args.pilots)
+                for concurrency in args.concurrency
+            ]
+    finally:
+        server.shutdown()
+
+    print(f"{args.pilots} pilots, {args.latency * 1000:.0f} ms latency, {args.error_rate:.1%} errors")
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "pilots": args.pilots,
+                "latency": args.latency,
+                "error_rate": args.error_rate,
+                "results": results,
+            }, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_with_baseline(results, json.load(f), args.max_slowdown)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Local stand-in for the Gliding App API, for benchmarking without network access.
+
+Implements the endpoints ApiClient uses: accounts.json (GET/PUT), competencies.json,
+competencies/user.json, competencies/assign.json and competencies/revoke.json, with
+in-memory state, a fixed per-request latency and a random share of 503 responses.
+
+    python benchmarks/mock_server.py --pilots 500 --latency 0.02 --error-rate 0.01 --port 8765
+
+then point "server" in config.json at http://127.0.0.1:8765 (any api_key works).
+Pilot i has id i and membership number 1000 + i.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MAPPINGS = os.path.join(REPO_DIR, "mappings-live.json")
+FIRST_MEMBERSHIP = 1000
+ACCOUNT_FIELDS = (
+    "medical_valid_from", "medical_valid_to", "medical_checked_at", "medical_checked_by",
+    "fis_date_refresher_course", "fis_date_training_flight",
+)
+
+
+def catalog_from_mappings(path=DEFAULT_MAPPINGS):
+    """The competencies.json payload: every competency the mapping file targets, in its curriculum/category."""
+    with open(path, "r", encoding="utf-8") as f:
+        mappings = json.load(f)
+    curricula = {}
+    for pair in mappings:
+        target = pair["target"]
+        if target["__type__"] != "Competency":
+            continue
+        _, curriculum, category, name = target["path"].split(" / ")
+        categories = curricula.setdefault(curriculum, {})
+        categories.setdefault(category, []).append({"id": target["id"], "name": name})
+    return [
+        {"name": curriculum, "categories": [{"name": category, "competencies": comps} for category, comps in categories.items()]}
+        for curriculum, categories in curricula.items()
+    ]
+
+
+class MockGlidingApp:
+    """In-memory club: accounts, the competency catalog and each pilot's assigned competencies."""
+
+    def __init__(self, pilots=200, latency=0.0, error_rate=0.0, seed=1, mappings_path=DEFAULT_MAPPINGS):
+        self.pilot_count = pilots
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.catalog = catalog_from_mappings(mappings_path)
+        self.competency_ids = [comp["id"] for cur in self.catalog for cat in cur["categories"] for comp in cat["competencies"]]
+        self.requests = Counter()  # "METHOD /path" → requests served, including injected errors
+        self.errors = Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        """Back to the initial club (same seed, same data) and zero counters."""
+        rnd = random.Random(self.seed)
+        with self._lock:
+            self.accounts = {}
+            self.assigned = {}
+            for pilot_id in range(1, self.pilot_count + 1):
+                data = {field: None for field in ACCOUNT_FIELDS}
+                if rnd.random() < 0.7:
+                    data["medical_valid_from"] = f"20{rnd.randint(15, 24)}-0{rnd.randint(1, 9)}-1{rnd.randint(0, 9)}"
+                self.accounts[pilot_id] = {
+                    "id": pilot_id,
+                    "lid_nummer": str(FIRST_MEMBERSHIP + pilot_id),
+                    "name": f"Pilot {FIRST_MEMBERSHIP + pilot_id}",
+                    "data": data,
+                }
+                self.assigned[pilot_id] = {
+                    comp_id: {"competency_id": comp_id, "date_assigned": "2020-01-01", "date_valid_to": None}
+                    for comp_id in rnd.sample(self.competency_ids, rnd.randint(0, min(4, len(self.competency_ids))))
+                }
+            self.requests.clear()
+            self.errors.clear()
+
+    def handle(self, method, path, query, body):
+        """Returns (status, payload) for one request."""
+        endpoint = f"{method} {path}"
+        with self._lock:
+            self.requests[endpoint] += 1
+            fail = self.error_rate and self._random.random() < self.error_rate
+            if fail:
+                self.errors[endpoint] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            return 503, {"error": "injected failure"}
+
+        with self._lock:
+            if endpoint == "GET /api/accounts.json":
+                return 200, [json.loads(json.dumps(account)) for account in self.accounts.values()]
+            if endpoint == "PUT /api/accounts.json":
+                account = self.accounts.get(body.get("id"))
+                if account is None:
+                    return 404, {"error": "unknown account"}
+                account["data"].update(body.get("data") or {})
+                return 200, json.loads(json.dumps(account))
+            if endpoint == "GET /api/competencies.json":
+                return 200, self.catalog
+            if endpoint == "GET /api/competencies/user.json":
+                user_id = int(query.get("user_id", ["0"])[0])
+                return 200, list(self.assigned.get(user_id, {}).values())
+            if endpoint == "POST /api/competencies/assign.json":
+                self.assigned.setdefault(body["user_id"], {})[body["id"]] = {
+                    "competency_id": body["id"],
+                    "date_assigned": body.get("date_assigned"),
+                    "date_valid_to": body.get("date_valid_to"),
+                }
+                return 200, {"ok": True}
+            if endpoint == "POST /api/competencies/revoke.json":
+                self.assigned.get(body["user_id"], {}).pop(body["id"], None)
+                return 200, {"ok": True}
+        return 404, {"error": f"no such endpoint: {endpoint}"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    app: MockGlidingApp = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"null") if length else None
+        status, payload = self.app.handle(method, url.path, parse_qs(url.query), body)
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 503:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+
+def start(app, host="127.0.0.1", port=0):
+    """Serves app on a background thread; returns the server (server.server_port, server.shutdown())."""
+    handler = type("Handler", (_Handler,), {"app": app})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gliding App API.")
+    parser.add_argument("--pilots", type=int, default=200, help="club size (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    app = MockGlidingApp(args.pilots, args.latency, args.error_rate, args.seed)
+    server = start(app, args.host, args.port)
+    print(f"Mock Gliding App with {args.pilots} pilots on http://{args.host}:{server.server_port} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -35,7 +35,7 @@ if (-not (Get-Command poetry -ErrorAction SilentlyContinue)) {
 Run-Exit_On_Error "poetry add --group dev pyinstaller"
 
 "Install dependencies..."
-Run-Exit_On_Error  "poetry install --no-root"
+Run-Exit_On_Error  "poetry install --no-root --with async"
 
 "Reading tag..."
 $Tag | Out-File -Encoding ASCII version.txt
@@ -0,0 +1,128 @@
+"""
+Headless sync, for running QualsSync unattended (e.g. from cron) without tkinter.
+
+    python main.py EXPORT.xlsx --mappings mappings-live.json            # compare only
+    python main.py EXPORT.xlsx --mappings mappings-live.json --apply    # upload
+    python main.py --plan plan.json --apply                             # apply a saved plan
+
+Exit codes: 0 success, 1 some updates failed, 2 bad arguments,
+3 could not load config/Excel/mappings/plan or reach the server, 130 cancelled.
+"""
+import argparse
+import signal
+import sys
+import threading
+from datetime import date
+
+import config
+
+EXIT_OK = 0
+EXIT_UPDATES_FAILED = 1
+EXIT_LOAD_FAILED = 3
+EXIT_CANCELLED = 130
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog=config.APP_NAME,
+        description="Compare or upload Aerolog qualifications to Gliding App without the GUI.",
+    )
+    parser.add_argument("excel", nargs="?", help="Aerolog Excel export (.xlsx)")
+    parser.add_argument("--mappings", help="mapping JSON saved from the GUI")
+    parser.add_argument("--plan", help="apply/show a plan saved earlier instead of comparing an Excel file")
+    parser.add_argument("--save-plan", metavar="PATH", help="save the computed plan as JSON")
+    parser.add_argument("--apply", action="store_true", help="upload changes (default is compare only)")
+    parser.add_argument("--concurrency", type=int, help="pilots processed in parallel (overrides upload_concurrency)")
+    parser.add_argument("--as-of", type=date.fromisoformat, metavar="YYYY-MM-DD",
+                        help="evaluate validity dates as of this day instead of today (compare only)")
+    parser.add_argument("--offline", action="store_true",
+                        help="compare with the local copy of the server state (state mirror); uploads re-check changed pilots live")
+    parser.add_argument("--delta", action="store_true",
+                        help="only compare members whose rows changed since the last upload (sets delta_sync)")
+    parser.add_argument("--since", metavar="PREVIOUS_EXPORT",
+                        help="delta mode against an earlier Aerolog export instead of the last upload")
+    parser.add_argument("--full-resync", action="store_true", help="compare every member, even in delta mode")
+    parser.add_argument("--config", default=config.CONFIG_FILE, help="config file (default: %(default)s)")
+    parser.add_argument("--quiet", action="store_true", help="only print warnings, errors and the summary")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.plan is None and (args.excel is None or args.mappings is None):
+        parser.error("an Excel file and --mappings are required unless --plan is given")
+    if args.as_of and args.apply:
+        parser.error("--as-of only compares; it can't be combined with --apply")
+
+    # imported here so --help doesn't pay for requests and the rest of the service
+    from sync_service import SyncService, CancelledByUserError
+
+    errors = []
+
+    def log(message, tag=None):
+        if tag == "error":
+            errors.append(message)
+            print(message, file=sys.stderr)
+        elif not args.quiet or tag == "warning":
+            print(message)
+
+    cancel_event = threading.Event()
+
+    def on_interrupt(signum, frame):
+        if cancel_event.is_set():
+            raise KeyboardInterrupt
+        print("Cancelling... (press Ctrl+C again to abort immediately)", file=sys.stderr)
+        cancel_event.set()
+
+    signal.signal(signal.SIGINT, on_interrupt)
+
+    try:
+        config.CONFIG_FILE = args.config
+        config_data = config.load_config(args.config)
+        if args.concurrency:
+            config_data["upload_concurrency"] = args.concurrency
+        if args.offline:
+            config_data["offline_compare"] = True
+        if args.delta:
+            config_data["delta_sync"] = True
+        service = SyncService(config_data)
+
+        plan = None
+        if args.plan:
+            plan = service.load_plan(args.plan)
+        else:
+            service.load_mappings(args.mappings)
+            service.load_excel_data(args.excel, cancel_event)
+            if args.since:
+                service.load_previous_export(args.since)
+            # a plain --apply compares inside upload_data, after the journal of an interrupted
+            # upload was opened, so that upload is continued instead of compared again
+            if args.save_plan or not args.apply:
+                plan = service.compare(cancel_event, args.as_of, revalidate=args.apply, log_callback=log, full_resync=args.full_resync)
+        if args.save_plan:
+            plan.save(args.save_plan)
+    except CancelledByUserError as e:
+        print(e, file=sys.stderr)
+        return EXIT_CANCELLED
+    except (OSError, ValueError, ImportError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_LOAD_FAILED
+
+    try:
+        result = service.upload_data(not args.apply, log, cancel_event, plan=plan, full_resync=args.full_resync)
+    except CancelledByUserError as e:
+        print(e, file=sys.stderr)
+        return EXIT_CANCELLED
+    except (OSError, ValueError) as e:  # ConnectionError and friends, a plan for another day
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_LOAD_FAILED
+    except KeyboardInterrupt:
+        return EXIT_CANCELLED
+
+    print(result)
+    return EXIT_UPDATES_FAILED if errors else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
 from datetime import date, datetime
 
 class Competency:
+    __slots__ = ("name", "path", "id")
+
     def __init__(self, name, path, comp_id):
         self.name = name
         self.path = path
@@ -1,8 +1,15 @@
 import json
+import os
 
-def load_config():
-    with open("config.json", "r", encoding="utf-8") as f:
+CONFIG_FILE = "config.json"
+
+def load_config(path=None):
+    with open(path or CONFIG_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
 
+def app_path(name):
+    """Path of a file or folder kept next to config.json (caches, journals, reports)."""
+    return os.path.join(os.path.dirname(os.path.abspath(CONFIG_FILE)), name)
+
 APP_NAME = "QualsSync"
 VERSION = "__DEV__VERSION__"
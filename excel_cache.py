@@ -0,0 +1,79 @@
+import hashlib
+import os
+import pickle
+from excel_row import ExcelRow
+
+ROW_KEYS = ExcelRow.KEYS
+
+
+class ExcelCache:
+    """
+    Keeps already-normalised Excel rows on disk, so re-opening the same export skips parsing.
+    Entries are keyed on path, size, mtime and content hash (plus a format tag), stored
+    column-wise in pickle files, and the oldest entries are evicted above max_bytes.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def file_digest(fpath):
+        """SHA-256 of the file's content, as a hex string."""
+        digest = hashlib.sha256()
+        with open(fpath, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, fpath, variant="", digest=None):
+        """
+        Returns the cached rows for fpath, or None on a miss or an unreadable entry.
+        digest is file_digest(fpath), if the caller already has it.
+        """
+        try:
+            entry_path = self._entry_path(fpath, variant, digest)
+            with open(entry_path, "rb") as f:
+                columns = pickle.load(f)
+            os.utime(entry_path)  # keep recently used entries at the back of the eviction queue
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        return [ExcelRow(*values) for values in zip(*(columns[k] for k in ROW_KEYS))]
+
+    def put(self, fpath, rows, variant="", digest=None):
+        """Stores rows for fpath. Failing to write the cache never fails the load."""
+        columns = {k: [row[k] for row in rows] for k in ROW_KEYS}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entry_path = self._entry_path(fpath, variant, digest)
+            tmp_path = entry_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(columns, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+            self._evict()
+        except OSError:
+            pass
+
+    def _entry_path(self, fpath, variant, digest=None):
+        stat = os.stat(fpath)
+        key = "|".join([
+            str(self.FORMAT_VERSION), variant, os.path.abspath(fpath),
+            str(stat.st_size), str(stat.st_mtime_ns), digest or self.file_digest(fpath)
+        ])
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".pkl")
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".pkl"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
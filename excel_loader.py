@@ -1,18 +1,51 @@
-try:
-    import pandas as pd
-except ModuleNotFoundError:
-    pd = None
 from datetime import datetime, timedelta
-import dateutil.parser
+import config
+from excel_cache import ExcelCache
+from excel_row import ExcelRow
+from export_fingerprint import ExportFingerprint
+from run_metrics import RunMetrics
+
+# pandas/numpy/openpyxl/dateutil are slow to import, so they are only loaded once an Excel file is parsed
+pd = None
+np = None
+openpyxl = None
+dateutil_parser = None
+
+
+def _import_excel_libraries():
+    global pd, np, openpyxl, dateutil_parser
+    if pd is None:
+        try:
+            import pandas as pd
+            import numpy as np
+        except ModuleNotFoundError:
+            pass
+    if openpyxl is None:
+        try:
+            import openpyxl
+        except ModuleNotFoundError:
+            pass
+    if dateutil_parser is None:
+        import dateutil.parser as dateutil_parser
 
 
 class ExcelLoader:
-    def __init__(self, config):
+    def __init__(self, config, metrics=None):
         self.config = config
-        self.rows = []
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        # SHA-256 of the loaded export's content, identifies it across runs (e.g. for the sync journal)
+        self.source_hash: str | None = None
+        # membership → row type → rows of that type, in file order
+        self.rows_by_member: dict[str, dict[str, list[ExcelRow]]] = {}
+        self._member_hashes: dict[str, str] | None = None
 
     def has_excel(self) -> bool:
-        return bool(self.rows) 
+        return bool(self.rows_by_member)
+
+    @property
+    def rows(self) -> list[ExcelRow]:
+        """Every row of the export, grouped by member (in order of first appearance) and type."""
+        return [row for rows_by_type in self.rows_by_member.values() for rows in rows_by_type.values() for row in rows]
 
     def load_excel(self, fpath):
         """
@@ -20,6 +53,39 @@ class ExcelLoader:
         Returns (expanded source_items, pilots list).
         """
 
+        streaming = self.config.get("excel_streaming", False)
+        variant = "streaming" if streaming else "pandas"
+        cache = self._get_cache()
+        with self.metrics.phase("excel_cache"):
+            try:
+                digest = ExcelCache.file_digest(fpath)
+            except OSError as e:
+                raise ValueError(f"Error reading Excel file: {e}") from e
+            rows = cache.get(fpath, variant, digest) if cache else None
+        cached = rows is not None
+        if not cached and streaming:
+            with self.metrics.phase("excel_read"):
+                # straight from the sheet into the per-member index, without a list of all rows
+                self._index_rows(self.iter_rows(fpath))
+        else:
+            if not cached:
+                with self.metrics.phase("excel_read"):
+                    rows = self._read_rows(fpath)
+            with self.metrics.phase("excel_index"):
+                self._index_rows(rows)
+        if cache and not cached:
+            with self.metrics.phase("excel_cache"):
+                cache.put(fpath, rows if rows is not None else self.rows, variant, digest)
+        self.source_hash = digest
+
+    def _get_cache(self):
+        if not self.config.get("excel_cache", True):
+            return None
+        directory = self.config.get("excel_cache_dir") or config.app_path("excel_cache")
+        return ExcelCache(directory, int(self.config.get("excel_cache_max_mb", 50)) * 1024 * 1024)
+
+    def _read_rows(self, fpath):
+        _import_excel_libraries()
         if not pd:
             raise ImportError("The 'pandas' and 'openpyxl' libraries are required to read Excel files.")
 
@@ -34,22 +100,136 @@ class ExcelLoader:
         membership_col = 'ACCOUNT'
         name_col = 'NAME'
 
-        # Extract rows
-        self.rows = []
-        for _, row in df.iterrows():
-            membership = str(row[membership_col]).strip()
-            name = str(row[name_col]).strip()
-            row_type = str(row.iloc[2]).strip()
-            value_from = self._parse_excel_date(row.iloc[4])
-            value_to = self._parse_excel_date(row.iloc[5])
-            self.rows.append({
-                "membership": membership,
-                "name": name,
-                "type": row_type,
-                "date from": value_from,
-                "date to": value_to
-            })
+        # Extract rows column by column; only odd date cells go through the scalar parser
+        memberships = self._text_column(df[membership_col])
+        names = self._text_column(df[name_col])
+        row_types = self._text_column(df.iloc[:, 2])
+        values_from = self._date_column(df.iloc[:, 4])
+        values_to = self._date_column(df.iloc[:, 5])
+        return [
+            ExcelRow(membership, name, row_type, value_from, value_to)
+            for membership, name, row_type, value_from, value_to
+            in zip(memberships, names, row_types, values_from, values_to)
+        ]
+
+    HEADER_ROW = 5  # Aerolog puts 4 lines of report title above the column headers
+
+    def iter_rows(self, fpath):
+        """
+        Streams the export with openpyxl's read-only mode and yields the same rows as
+        load_excel, one at a time, without holding the workbook or a DataFrame in memory.
+        """
+        _import_excel_libraries()
+        if not openpyxl:
+            raise ImportError("The 'openpyxl' library is required to read Excel files.")
+
+        try:
+            workbook = openpyxl.load_workbook(fpath, read_only=True, data_only=True)
+        except Exception as e:
+            raise ValueError(f"Error reading Excel file: {e}") from e
+
+        try:
+            sheet = workbook.worksheets[0]
+            cells = sheet.iter_rows(min_row=self.HEADER_ROW, values_only=True)
+            header = [str(h).strip() if h is not None else "" for h in next(cells, ())]
+            if len(header) < 6:
+                raise ValueError("Excel file error: First sheet has fewer than 6 columns.")
+            try:
+                membership_idx = header.index('ACCOUNT')
+                name_idx = header.index('NAME')
+            except ValueError as e:
+                raise ValueError(f"Excel file error: {e}") from e
+
+            for values in cells:
+                if all(v is None for v in values):
+                    continue
+                if len(values) < len(header):
+                    values += (None,) * (len(header) - len(values))  # trailing empty cells aren't stored
+                yield ExcelRow(
+                    self._cell_text(values[membership_idx]),
+                    self._cell_text(values[name_idx]),
+                    self._cell_text(values[2]),
+                    self._parse_excel_date(values[4]),
+                    self._parse_excel_date(values[5])
+                )
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _cell_text(value):
+        if value is None:
+            return ""
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)  # numeric membership cells must not become "1234.0"
+        return str(value).strip()
+
+    def _index_rows(self, rows):
+        """Groups rows by membership and type, so per-pilot lookups don't scan the whole export."""
+        index = {}
+        for row in rows:
+            index.setdefault(row["membership"], {}).setdefault(row["type"], []).append(row)
+        self.rows_by_member = index
+        self._member_hashes = None
+
+    def member_hashes(self) -> dict[str, str]:
+        """membership → hash of the member's rows, for delta mode (see ExportFingerprint)."""
+        if self._member_hashes is None:
+            self._member_hashes = ExportFingerprint.hash_members(self.rows_by_member)
+        return self._member_hashes
+
+    def rows_for_member(self, membership) -> dict[str, list[ExcelRow]]:
+        return self.rows_by_member.get(str(membership), {})
     
+    @staticmethod
+    def _text_column(column):
+        """Same as str(value).strip() per cell, done over the whole column."""
+        return column.astype(object).map(str).str.strip().tolist()
+
+    @classmethod
+    def _date_column(cls, column):
+        """
+        Column-wise equivalent of _parse_excel_date: native datetimes, Excel serial numbers and
+        dd/mm/yyyy strings are converted in bulk, anything else falls back to the scalar parser.
+        """
+        if pd.api.types.is_datetime64_any_dtype(column):
+            parsed = column
+        elif pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            parsed = cls._serial_to_datetime(column)
+        else:
+            parsed = pd.Series(pd.NaT, index=column.index, dtype="datetime64[ns]")
+            kinds = column.map(type)
+            is_datetime = kinds.map(lambda k: issubclass(k, datetime))
+            is_number = kinds.map(lambda k: issubclass(k, (int, float)) and not issubclass(k, bool))
+            is_text = kinds.map(lambda k: issubclass(k, str))
+            if is_datetime.any():
+                parsed[is_datetime] = pd.to_datetime(column[is_datetime], errors="coerce")
+            if is_number.any():
+                parsed[is_number] = cls._serial_to_datetime(column[is_number])
+            if is_text.any():
+                parsed[is_text] = pd.to_datetime(column[is_text], format="%d/%m/%Y", errors="coerce")
+
+        result = parsed.dt.strftime("%Y-%m-%d").astype(object)
+        result[parsed.isna()] = None
+
+        # cells the bulk conversion couldn't handle (NaN/None are None either way)
+        leftover = parsed.isna() & column.notna()
+        if leftover.any():
+            result[leftover] = column[leftover].map(cls._parse_excel_date)
+        return result.tolist()
+
+    @staticmethod
+    def _serial_to_datetime(column):
+        # Excel serial date, whole days only (same as int(value) in _parse_excel_date).
+        # Only finite serials within datetime64[ns] reach pd.to_datetime, as int64: its float path
+        # rounds uninitialised memory for NaN cells and can raise FloatingPointError.
+        # Anything else stays NaT, for _parse_excel_date to handle.
+        days = pd.to_numeric(column, errors="coerce").astype(float)
+        parsed = pd.Series(pd.NaT, index=column.index, dtype="datetime64[ns]")
+        in_range = (days > -80000) & (days < 130000)
+        if in_range.any():
+            parsed[in_range] = pd.to_datetime(np.trunc(days[in_range]).astype("int64"), unit="D", origin="1899-12-30")
+        return parsed
+
     @staticmethod
     def _parse_excel_date(value):
         if value is None or value == '':
@@ -62,6 +242,8 @@ class ExcelLoader:
                 excel_epoch = datetime(1899, 12, 30)
                 return (excel_epoch + timedelta(days=int(value))).strftime("%Y-%m-%d")
             if isinstance(value, str):
-                return dateutil.parser.parse(value, dayfirst=True).strftime("%Y-%m-%d")
+                if dateutil_parser is None:
+                    _import_excel_libraries()
+                return dateutil_parser.parse(value, dayfirst=True).strftime("%Y-%m-%d")
         except Exception:
             return None
@@ -0,0 +1,77 @@
+import sys
+from datetime import date
+from functools import lru_cache
+
+
+class ExcelRow:
+    """
+    One normalised row of the Aerolog export, kept compact: slotted, with interned strings and
+    dates stored as ordinal ints. Reads like the dicts it replaces (row["date from"], row.get(...)).
+    """
+
+    __slots__ = ("membership", "name", "type", "_date_from", "_date_to")
+
+    KEYS = ("membership", "name", "type", "date from", "date to")
+
+    def __init__(self, membership, name, row_type, date_from, date_to):
+        self.membership = sys.intern(membership)
+        self.name = sys.intern(name)
+        self.type = sys.intern(row_type)
+        self._date_from = _pack_date(date_from)
+        self._date_to = _pack_date(date_to)
+
+    @property
+    def date_from(self):
+        return _unpack_date(self._date_from)
+
+    @property
+    def date_to(self):
+        return _unpack_date(self._date_to)
+
+    def __getitem__(self, key):
+        if key == "date from":
+            return self.date_from
+        if key == "date to":
+            return self.date_to
+        if key in ("membership", "name", "type"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if isinstance(other, ExcelRow):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ExcelRow({self.to_dict()!r})"
+
+    def to_dict(self):
+        return {key: self[key] for key in self.KEYS}
+
+
+def _pack_date(value):
+    """'%Y-%m-%d' → ordinal int; None and anything that isn't an ISO date are kept as they are."""
+    if value is None:
+        return None
+    try:
+        packed = date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+    return packed.toordinal() if packed.isoformat() == value else value
+
+
+@lru_cache(maxsize=None)
+def _unpack_ordinal(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _unpack_date(packed):
+    return _unpack_ordinal(packed) if isinstance(packed, int) else packed
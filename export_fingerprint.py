@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+from datetime import date
+
+
+class ExportFingerprint:
+    """
+    What the last upload synced: a hash of every synced member's export rows, plus the server,
+    mappings and as-of date it ran with. Delta mode compares a new export against it, so only
+    members whose rows were added or changed, or whose dates passed a rule boundary since,
+    are compared and uploaded.
+
+    A member is only recorded once all of its updates succeeded, so a failed member is
+    compared again next time.
+    """
+
+    VERSION = 1
+
+    def __init__(self, member_hashes, as_of, server=None, mapping_hash=None):
+        self.member_hashes: dict[str, str] = member_hashes
+        self.as_of: date = as_of
+        self.server = server  # None: unknown (a previous export file), assumed to be the same
+        self.mapping_hash = mapping_hash
+
+    @staticmethod
+    def hash_members(rows_by_member):
+        """membership → SHA-256 of the member's rows (name, type and dates, in file order)."""
+        hashes = {}
+        for membership, rows_by_type in rows_by_member.items():
+            digest = hashlib.sha256()
+            for rows in rows_by_type.values():
+                for row in rows:
+                    digest.update(json.dumps([row["name"], row["type"], row["date from"], row["date to"]]).encode("utf-8"))
+            hashes[membership] = digest.hexdigest()
+        return hashes
+
+    @classmethod
+    def load(cls, path):
+        """The fingerprint saved at path, or None if there is none (or it can't be read)."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != cls.VERSION:
+                return None
+            return cls(data["members"], date.fromisoformat(data["as_of"]), data.get("server"), data.get("mapping_hash"))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.VERSION,
+                "as_of": self.as_of.isoformat(),
+                "server": self.server,
+                "mapping_hash": self.mapping_hash,
+                "members": self.member_hashes,
+            }, f)
+        os.replace(tmp_path, path)  # an interrupted save keeps the previous fingerprint
+
+    def changed_members(self, member_hashes, rows_by_member, as_of):
+        """
+        Returns (changed, dated): memberships whose rows differ from the fingerprint (or that it
+        doesn't have), and unchanged ones with a date from/date to that the rules see differently
+        on as_of than on the fingerprint's as-of date.
+        """
+        changed, dated = set(), set()
+        since, until = self.as_of.isoformat(), as_of.isoformat()
+        for membership, member_hash in member_hashes.items():
+            if self.member_hashes.get(membership) != member_hash:
+                changed.add(membership)
+            elif self._dates_passed(rows_by_member.get(membership, {}), since, until):
+                dated.add(membership)
+        return changed, dated
+
+    @staticmethod
+    def _dates_passed(rows_by_type, since, until):
+        # a row is valid from its date from and until its date to (both inclusive), see RulesEngine
+        for rows in rows_by_type.values():
+            for row in rows:
+                date_from, date_to = row["date from"], row["date to"]
+                if date_from and since < date_from <= until:
+                    return True
+                if date_to and since <= date_to < until:
+                    return True
+        return False
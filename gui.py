@@ -4,13 +4,20 @@ from tkinter import filedialog
 import traceback
 
 import config
+import startup_timing
 from sync_service import SyncService, CancelledByUserError
 from competency import Competency
+from log_sink import LogSink
+from target_tree_index import TargetTreeIndex
 
 import threading
 
 
 class App(tk.Tk):
+    PILOTS_CHUNK = 500          # pilots inserted per main-loop turn
+    TREE_FILTER_LIMIT = 2000    # matching leaves shown for a target filter
+    TREE_FILTER_DELAY_MS = 200  # wait for the user to stop typing before filtering
+
     def __init__(self):
         super().__init__()
         self.title("QualsSync - maps and synchronises technical qualifications - " + config.VERSION)
@@ -25,6 +32,12 @@ class App(tk.Tk):
 
         # Data holders
         self._competency_map: dict[str, Competency] = {}
+        self.target_tree_dict = {}
+        self._target_index: TargetTreeIndex | None = None
+        # target tree items whose children haven't been inserted yet → their subtree
+        self._lazy_tree_nodes: dict[str, dict | list] = {}
+        self._tree_filter_after_id = None
+        self._pilots_fill_after_id = None
 
         self._build_widgets()
         
@@ -78,6 +91,13 @@ class App(tk.Tk):
         hdr_tgt.columnconfigure(0, weight=1)
         ttk.Label(hdr_tgt, text="Target hierarchy").grid(row=0, column=0, sticky="w")
         ttk.Button(hdr_tgt, text="Load Target Tree", command=self._load_target_tree).grid(row=0, column=1, sticky="e")
+        filter_row = ttk.Frame(hdr_tgt)
+        filter_row.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(4, 0))
+        filter_row.columnconfigure(1, weight=1)
+        ttk.Label(filter_row, text="Filter:").grid(row=0, column=0, sticky="w")
+        self.tree_filter_var = tk.StringVar()
+        self.tree_filter_var.trace_add("write", lambda *_: self._schedule_tree_filter())
+        ttk.Entry(filter_row, textvariable=self.tree_filter_var).grid(row=0, column=1, sticky="ew", padx=(4, 0))
         self.tree = ttk.Treeview(tgt_frame, show="tree", selectmode="browse")
         yscroll_tree = ttk.Scrollbar(tgt_frame, orient="vertical", command=self.tree.yview)
         self.tree.configure(yscrollcommand=yscroll_tree.set)
@@ -85,6 +105,7 @@ class App(tk.Tk):
         yscroll_tree.grid(row=1, column=1, sticky="ns")
 
         self.tree.bind("<Double-1>", self._on_tree_double_click)
+        self.tree.bind("<<TreeviewOpen>>", self._on_tree_open)
 
         self.tree_source.bind("<<TreeviewSelect>>", self._on_source_tree_select)
         self.tree_predefined.bind("<<TreeviewSelect>>", self._on_source_tree_select)
@@ -147,6 +168,20 @@ class App(tk.Tk):
             variable=self.check_only_var
         )
         self.chk_check_only.grid(row=0, column=1, padx=(8, 0), sticky="e")
+        # "Full resync" checkbox, only offered in delta mode
+        self.full_resync_var = tk.BooleanVar()
+        if self.config_data.get("delta_sync", False):
+            ttk.Checkbutton(
+                upload_frame,
+                text="Full resync (all members)",
+                variable=self.full_resync_var
+            ).grid(row=1, column=1, padx=(8, 0), sticky="e")
+        # Apply / save the plan from the last comparison, so it doesn't have to be recomputed
+        self.btn_apply_plan = ttk.Button(upload_frame, text="Apply compared plan", command=self.apply_plan, state=tk.DISABLED)
+        self.btn_apply_plan.grid(row=0, column=2, padx=(8, 0), sticky="e")
+        self.btn_save_plan = ttk.Button(upload_frame, text="Save plan…", command=self._save_plan, state=tk.DISABLED)
+        self.btn_save_plan.grid(row=0, column=3, padx=(4, 0), sticky="e")
+        ttk.Button(upload_frame, text="Load plan…", command=self._load_plan).grid(row=0, column=4, padx=(4, 0), sticky="e")
       
 
         # Log textbox
@@ -160,11 +195,22 @@ class App(tk.Tk):
         self.txt_log.tag_configure("success", foreground="green")
         self.txt_log.tag_configure("warning", foreground="orange")
         self.txt_log.tag_configure("error", foreground="red", background="#ffeeee")
+        # workers log through a queue drained by the main loop, see LogSink
+        self.log_sink = LogSink(
+            self.txt_log,
+            max_lines=self.config_data.get("log_max_lines", 5000),
+            spill_path=self.config_data.get("log_file"),
+        )
+        self.log_sink.start()
 
     def _set_initial_position(self):
         self.update_idletasks()      # Ensure layout is calculated
         self.geometry("+50+30")      # Move window near top-left
         self.deiconify()             # Show the window if it was hidden
+        if startup_timing.is_enabled():
+            self.update_idletasks()
+            startup_timing.mark("first paint")
+            startup_timing.report()
 
     # ----------- Data Loading -----------------------------
 
@@ -175,30 +221,82 @@ class App(tk.Tk):
         def callback(tree):
             if tree:
                 self.target_tree_dict = tree
-                self.tree.delete(*self.tree.get_children())
-                self._populate_tree(self.target_tree_dict, "")
+                self._target_index = TargetTreeIndex(tree)
+                self._show_target_tree()
             else:
                 self.log_warning("No target data loaded.")
 
         self.run_with_modal("Loading...", "Loading Target Gliding App data. Please wait...", background_task, callback)
 
 
+    def _show_target_tree(self):
+        """Shows the whole tree (top level expanded), or only the leaves matching the filter box."""
+        self.tree.delete(*self.tree.get_children())
+        self._competency_map.clear()
+        self._lazy_tree_nodes.clear()
+        query = self.tree_filter_var.get().strip()
+        if query and self._target_index is not None:
+            self._populate_tree_matches(self._target_index.search(query, self.TREE_FILTER_LIMIT))
+            return
+        self._populate_tree(self.target_tree_dict, "")
+        for iid in self.tree.get_children():
+            self._expand_tree_node(iid)
+            self.tree.item(iid, open=True)
+
     def _populate_tree(self, d: dict | list, parent: str):
+        """Inserts one level only; branches get a placeholder child and are filled in when opened."""
         if isinstance(d, dict):
             for k, v in d.items():
-                iid = self.tree.insert(parent, "end", text=k, open=True)
-                self._populate_tree(v, iid)
+                iid = self.tree.insert(parent, "end", text=k)
+                if v:
+                    self._lazy_tree_nodes[iid] = v
+                    self.tree.insert(iid, "end", text="…")
         elif isinstance(d, list):
             for item in d:
                 if isinstance(item, Competency):
-                    iid = self.tree.insert(parent, "end", text=item.name, values=[item], open=True)
+                    iid = self.tree.insert(parent, "end", text=item.name, values=[item])
                     self._competency_map[iid] = item
                 else:
-                    self.tree.insert(parent, "end", text=str(item), open=True)
+                    self.tree.insert(parent, "end", text=str(item))
         else:
             # single string or None
             if d:
-                self.tree.insert(parent, "end", text=str(d), open=True)
+                self.tree.insert(parent, "end", text=str(d))
+
+    def _populate_tree_matches(self, leaves):
+        """Inserts the given (path, competency) leaves of the index with their parents, all expanded."""
+        branches = {}
+        for path, competency in leaves:
+            parent = ""
+            for depth in range(1, len(path)):
+                prefix = path[:depth]
+                if prefix not in branches:
+                    branches[prefix] = self.tree.insert(parent, "end", text=prefix[-1], open=True)
+                parent = branches[prefix]
+            if competency:
+                iid = self.tree.insert(parent, "end", text=path[-1], values=[competency])
+                self._competency_map[iid] = competency
+            else:
+                self.tree.insert(parent, "end", text=path[-1])
+
+    def _on_tree_open(self, event):
+        self._expand_tree_node(self.tree.focus())
+
+    def _expand_tree_node(self, iid):
+        subtree = self._lazy_tree_nodes.pop(iid, None)
+        if subtree is None:
+            return
+        self.tree.delete(*self.tree.get_children(iid))  # the placeholder
+        self._populate_tree(subtree, iid)
+
+    def _schedule_tree_filter(self):
+        if self._tree_filter_after_id is not None:
+            self.after_cancel(self._tree_filter_after_id)
+        self._tree_filter_after_id = self.after(self.TREE_FILTER_DELAY_MS, self._apply_tree_filter)
+
+    def _apply_tree_filter(self):
+        self._tree_filter_after_id = None
+        self._show_target_tree()
 
     # ----------- Excel Loading -----------------------------
 
@@ -216,11 +314,12 @@ class App(tk.Tk):
         def callback(result):
             source_items, pilots = result
             
-            # Update pilots listbox
-            self.lb_pilots.delete(0, tk.END)
-            for name, membership, pilot_id in pilots:
-                pilot_id_str = pilot_id if pilot_id else "NOT FOUND"
-                self.lb_pilots.insert(tk.END, f"{membership} — {name} - {pilot_id_str}")
+            # Update pilots listbox, a chunk per main-loop turn so large clubs don't stall the UI
+            lines = [
+                f"{membership} — {name} - {pilot_id if pilot_id else 'NOT FOUND'}"
+                for name, membership, pilot_id in pilots
+            ]
+            self._fill_pilots(lines)
 
             # Update source items listbox
             self.tree_source.delete(*self.tree_source.get_children())
@@ -231,6 +330,18 @@ class App(tk.Tk):
             self._update_upload_button_state()
 
         self.run_with_modal("Loading..", "Loading Excel file. Please wait...", background_task, callback)
+
+    def _fill_pilots(self, lines, start=0):
+        if start == 0:
+            if self._pilots_fill_after_id is not None:
+                self.after_cancel(self._pilots_fill_after_id)
+            self.lb_pilots.delete(0, tk.END)
+        end = start + self.PILOTS_CHUNK
+        self.lb_pilots.insert(tk.END, *lines[start:end])
+        if end < len(lines):
+            self._pilots_fill_after_id = self.after(1, self._fill_pilots, lines, end)
+        else:
+            self._pilots_fill_after_id = None
         
          
 
@@ -258,7 +369,7 @@ class App(tk.Tk):
         sel_target_id = sel_target_id[0]
 
         # Only allow mapping leaves in target tree
-        if self.tree.get_children(sel_target_id):
+        if self.tree.get_children(sel_target_id) or self.tree.parent(sel_target_id) in self._lazy_tree_nodes:
             messagebox.showwarning("Mapping restriction", "Only leaf nodes in target tree can be mapped.")
             return
         
@@ -301,6 +412,7 @@ class App(tk.Tk):
         index = sel[0]
         self.service.delete_mapping(index)
         self._update_mappings_list()
+        self._update_upload_button_state()
 
     def _get_full_tree_path(self, item_id):
         parts = []
@@ -394,17 +506,18 @@ class App(tk.Tk):
 
     def upload_data(self):
         check_only = self.check_only_var.get()
+        full_resync = self.full_resync_var.get()
+
+        # Clear previous log entries before starting
+        self.log_sink.clear()
 
         def task(cancel_event):
-            # Clear previous log entries before starting
-            self.txt_log.config(state='normal')
-            self.txt_log.delete(1.0, tk.END)
-            self.txt_log.config(state='disabled')
-            return self.service.upload_data(check_only, self.log, cancel_event)
+            return self.service.upload_data(check_only, self.log, cancel_event, full_resync=full_resync)
 
         def on_complete(result):
             # The service returns a summary message
             self.log_info(f"\n----- {result} -----")
+            self._update_plan_buttons_state()
 
         self.run_with_modal("Uploading.." if not check_only else "Comparing..",
             "Uploading data to Gliding.App. Please wait..." if not check_only else "Comparing data with Gliding.App. Please wait...",
@@ -413,6 +526,59 @@ class App(tk.Tk):
         
 
 
+    def apply_plan(self):
+        plan = self.service.last_plan
+        if plan is None:
+            return
+        if not messagebox.askyesno("Apply plan", f"Apply {len(plan)} planned changes to Gliding.App without comparing again?"):
+            return
+
+        self.log_sink.clear()
+
+        def task(cancel_event):
+            return self.service.upload_data(False, self.log, cancel_event, plan=plan)
+
+        def on_complete(result):
+            self.log_info(f"\n----- {result} -----")
+            self._update_plan_buttons_state()
+
+        self.run_with_modal("Uploading..", "Uploading data to Gliding.App. Please wait...", task, on_complete)
+
+    def _save_plan(self):
+        if self.service.last_plan is None:
+            return
+        fname = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json")],
+            title="Save sync plan to JSON",
+        )
+        if not fname:
+            return
+        try:
+            self.service.save_plan(fname)
+            messagebox.showinfo("Saved", f"Plan saved to {fname}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save:\n{e}")
+
+    def _load_plan(self):
+        fname = filedialog.askopenfilename(
+            filetypes=[("JSON files", "*.json")],
+            title="Load sync plan from JSON",
+        )
+        if not fname:
+            return
+        try:
+            plan = self.service.load_plan(fname)
+            self.log_info(f"Loaded plan with {len(plan)} changes for {len(plan.pilots)} pilots.")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load plan:\n{e}")
+        self._update_plan_buttons_state()
+
+    def _update_plan_buttons_state(self):
+        state = tk.NORMAL if self.service.last_plan is not None else tk.DISABLED
+        self.btn_apply_plan.config(state=state)
+        self.btn_save_plan.config(state=state)
+
     # ----------- Tree double click -----------------------
 
     def _on_tree_double_click(self, event):
@@ -432,17 +598,14 @@ class App(tk.Tk):
             self.btn_upload.config(state=tk.NORMAL)
         else:
             self.btn_upload.config(state=tk.DISABLED)
+        # a new export or changed mappings drop the compared plan
+        self._update_plan_buttons_state()
 
     # ----------- Log Window -----------------
 
     def log(self, message: str, tag: str = None):
-        self.txt_log.config(state='normal')
-        if tag:
-            self.txt_log.insert(tk.END, message + "\n", tag)
-        else:
-            self.txt_log.insert(tk.END, message + "\n")
-        self.txt_log.see(tk.END)
-        self.txt_log.config(state='disabled') 
+        # called from worker threads too, so only enqueue; the main loop does the drawing
+        self.log_sink.write(message, tag)
 
     def log_error(self, message):
         self.log(message, "error") 
@@ -1,82 +1,117 @@
 from datetime import datetime, date
 
-def apply_medical_check_rule(updates, account_data, name, log_callback):
+_INVALID = object()  # memoised marker for date strings that don't parse
+
+
+class RulesEngine:
     """
-    Applies the business rule that 'medical_checked_at' and 'medical_checked_by'
-    fields should only be updated if the pilot's medical qualification is current
-    and its validity dates are also being updated.
-    This modifies the 'updates' dictionary in place.
+    Evaluates the business rules below against one fixed as-of date for a whole run, so a sync
+    that crosses midnight sees a single "today", and a plan can be computed for any date.
+    Parsed date strings are memoised, as the same dates repeat across many pilots.
     """
-    is_checking_medical = 'medical_checked_at' in updates or 'medical_checked_by' in updates
-    if not is_checking_medical:
-        return
 
-    def is_medical_current(valid_from_str, valid_to_str):
-        today = date.today()
+    # account data fields the rules read, on top of the mapped ones
+    ACCOUNT_FIELDS = ("medical_valid_from", "medical_valid_to", "medical_checked_at", "medical_checked_by")
+
+    def __init__(self, as_of: date | None = None):
+        self.as_of = as_of or date.today()
+        self._parsed: dict[str, date | object] = {}
+
+    def parse_date(self, value):
+        """Returns the date for a "%Y-%m-%d" string, None for empty values; raises ValueError otherwise."""
+        if not value:
+            return None
+        parsed = self._parsed.get(value)
+        if parsed is None:
+            try:
+                parsed = datetime.strptime(value, "%Y-%m-%d").date()
+            except (ValueError, TypeError):
+                parsed = _INVALID
+            self._parsed[value] = parsed
+        if parsed is _INVALID:
+            raise ValueError(f"Invalid date: {value!r}")
+        return parsed
+
+    def should_assign(self, value_from: str | None, value_to: str | None) -> bool:
+        """
+        Business rule to determine if a competency should be assigned based on its
+        validity dates compared to the as-of date.
+        """
         try:
-            vf = datetime.strptime(valid_from_str, "%Y-%m-%d").date() if valid_from_str else None
-            vt = datetime.strptime(valid_to_str, "%Y-%m-%d").date() if valid_to_str else None
-        except (ValueError, TypeError):
+            vf = self.parse_date(value_from)
+            vt = self.parse_date(value_to)
+        except ValueError:
+            return False # Handles malformed or non-string date values
+
+        if vf is None and vt is None:
+            return True
+
+        if vf and vf > self.as_of:
+            return False  # starts in the future
+
+        if vt and vt < self.as_of:
+            return False  # already expired
+
+        return True
+
+    def is_medical_current(self, valid_from_str, valid_to_str) -> bool:
+        try:
+            vf = self.parse_date(valid_from_str)
+            vt = self.parse_date(valid_to_str)
+        except ValueError:
             return False  # Handles malformed or non-string date values
 
         if vf is None and vt is None:
             return False  # Not current if no dates are provided
-        if vf and vf > today:
+        if vf and vf > self.as_of:
             return False  # Not yet valid
-        if vt and vt < today:
+        if vt and vt < self.as_of:
             return False  # Expired
         return True
 
-    is_validity_dates_updating = 'medical_valid_from' in updates or 'medical_valid_to' in updates
-
-    # Use the new validity dates if they're part of this update, otherwise use existing data.
-    effective_valid_from = updates.get('medical_valid_from', account_data.get('medical_valid_from'))
-    effective_valid_to = updates.get('medical_valid_to', account_data.get('medical_valid_to'))
-
-    medical_is_current = is_medical_current(effective_valid_from, effective_valid_to)
-
-    if not is_validity_dates_updating or not medical_is_current:
-        reasons = []
-        if not is_validity_dates_updating:
-            reasons.append("medical validity dates are not changing")
-        if not medical_is_current:
-            reasons.append("medical is not current")
-        reason_str = " and ".join(reasons)
-
-        skipped_fields = []
-        if 'medical_checked_at' in updates:
-            updates.pop('medical_checked_at')
-            skipped_fields.append("'medical_checked_at'")
-        if 'medical_checked_by' in updates:
-            updates.pop('medical_checked_by')
-            skipped_fields.append("'medical_checked_by'")
-        
-        if skipped_fields:
-            log_callback(f"Skipping update of {', '.join(skipped_fields)} for {name}: {reason_str}.", "warning")
+    def apply_medical_check_rule(self, updates, account_data, name, log_callback):
+        """
+        Applies the business rule that 'medical_checked_at' and 'medical_checked_by'
+        fields should only be updated if the pilot's medical qualification is current
+        and its validity dates are also being updated.
+        This modifies the 'updates' dictionary in place.
+        """
+        is_checking_medical = 'medical_checked_at' in updates or 'medical_checked_by' in updates
+        if not is_checking_medical:
+            return
 
-def should_assign_competency_based_on_dates(value_from: str | None, value_to: str | None) -> bool:
-    """
-    Business rule to determine if a competency should be assigned based on its
-    validity dates compared to the current date.
-    """
-    today = date.today()
+        is_validity_dates_updating = 'medical_valid_from' in updates or 'medical_valid_to' in updates
 
-    def parse(d):
-        return datetime.strptime(d, "%Y-%m-%d").date() if d else None
+        # Use the new validity dates if they're part of this update, otherwise use existing data.
+        effective_valid_from = updates.get('medical_valid_from', account_data.get('medical_valid_from'))
+        effective_valid_to = updates.get('medical_valid_to', account_data.get('medical_valid_to'))
 
-    try:
-        vf = parse(value_from)
-        vt = parse(value_to)
-    except (ValueError, TypeError):
-        return False # Handles malformed or non-string date values
+        medical_is_current = self.is_medical_current(effective_valid_from, effective_valid_to)
 
-    if vf is None and vt is None:
-        return True
+        if not is_validity_dates_updating or not medical_is_current:
+            reasons = []
+            if not is_validity_dates_updating:
+                reasons.append("medical validity dates are not changing")
+            if not medical_is_current:
+                reasons.append("medical is not current")
+            reason_str = " and ".join(reasons)
 
-    if vf and vf > today:
-        return False  # starts in the future
+            skipped_fields = []
+            if 'medical_checked_at' in updates:
+                updates.pop('medical_checked_at')
+                skipped_fields.append("'medical_checked_at'")
+            if 'medical_checked_by' in updates:
+                updates.pop('medical_checked_by')
+                skipped_fields.append("'medical_checked_by'")
+            
+            if skipped_fields:
+                log_callback(f"Skipping update of {', '.join(skipped_fields)} for {name}: {reason_str}.", "warning")
 
-    if vt and vt < today:
-        return False  # already expired
 
-    return True
+def apply_medical_check_rule(updates, account_data, name, log_callback):
+    """apply_medical_check_rule evaluated as of today, see RulesEngine."""
+    RulesEngine().apply_medical_check_rule(updates, account_data, name, log_callback)
+
+def should_assign_competency_based_on_dates(value_from: str | None, value_to: str | None) -> bool:
+    """should_assign evaluated as of today, see RulesEngine."""
+    return RulesEngine().should_assign(value_from, value_to)
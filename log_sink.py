@@ -0,0 +1,80 @@
+import queue
+import tkinter as tk
+from datetime import datetime
+
+
+class LogSink:
+    """
+    Feeds the log Text widget from any thread: write() only puts a (time, tag, message) record
+    on a queue, and the Tk main loop drains it in batches every interval_ms with a single insert.
+    The widget keeps the last max_lines lines; if spill_path is set, every record is also
+    appended to that file, so nothing is lost when old lines scroll out of the window.
+    """
+
+    def __init__(self, text_widget, max_lines=5000, spill_path=None, interval_ms=100, batch_size=2000):
+        self.text = text_widget
+        self.max_lines = max_lines
+        self.spill_path = spill_path
+        self.interval_ms = interval_ms
+        self.batch_size = batch_size
+        self._queue = queue.SimpleQueue()
+        self._after_id = None
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.text.after(self.interval_ms, self._drain)
+
+    def write(self, message, tag=None):
+        """Safe to call from worker threads."""
+        self._queue.put((datetime.now(), tag, message))
+
+    def clear(self):
+        """Empties the window (main thread only). Pending records still go to the spill file."""
+        self._spill(self._take(None))
+        self.text.config(state='normal')
+        self.text.delete("1.0", tk.END)
+        self.text.config(state='disabled')
+
+    def _drain(self):
+        try:
+            self._show(self._take(self.batch_size))
+        finally:
+            self._after_id = self.text.after(self.interval_ms, self._drain)
+
+    def _take(self, limit):
+        records = []
+        while limit is None or len(records) < limit:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def _show(self, records):
+        if not records:
+            return False
+        self._spill(records)
+
+        # Text.insert takes text/tags pairs, so the whole batch is one widget call
+        chunks = []
+        for _, tag, message in records:
+            chunks += [message + "\n", (tag,) if tag else ()]
+        self.text.config(state='normal')
+        self.text.insert(tk.END, *chunks)
+        # every message ends in a newline, so the last (empty) line isn't counted
+        line_count = int(self.text.index("end-1c").split(".")[0]) - 1
+        if self.max_lines and line_count > self.max_lines:
+            self.text.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+        self.text.see(tk.END)
+        self.text.config(state='disabled')
+        return True
+
+    def _spill(self, records):
+        if not self.spill_path or not records:
+            return
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for logged_at, tag, message in records:
+                    f.write(f"{logged_at:%Y-%m-%d %H:%M:%S} {tag or 'info':<7} {message}\n")
+        except OSError:
+            self.spill_path = None  # don't retry a broken path on every batch
@@ -1,4 +1,14 @@
+import sys
+import startup_timing
+
 if __name__ == "__main__":
+    startup_timing.start()
+    if len(sys.argv) > 1:
+        # any argument means a headless run, see cli.py
+        from cli import main
+        sys.exit(main())
     from gui import App
+    startup_timing.mark("gui imported")
     app = App()
-    app.mainloop()
\ No newline at end of file
+    startup_timing.mark("window built")
+    app.mainloop()
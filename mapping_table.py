@@ -0,0 +1,46 @@
+from datetime import datetime
+import config
+from competency import Competency
+
+PREDEFINED_VALUES_GENERATORS = {
+    "Current DateTime": lambda: datetime.now().astimezone().isoformat(),
+    "App Name (QualsSync)": lambda: config.APP_NAME
+}
+
+
+class MappingTable:
+    """
+    SyncService.mappings compiled once per run: sources are pre-split, account-field and competency
+    targets are separated, and predefined values are evaluated a single time, so the per-pilot
+    compare only does dict lookups. Entries keep the order of the mappings list.
+    """
+
+    def __init__(self, mappings):
+        # (row_type, "date from" | "date to", field_name, None) for Excel values,
+        # (None, None, field_name, value) for predefined values
+        self.account_fields: list[tuple[str | None, str | None, str, str | None]] = []
+        # (row_type, competency), the source was already unsplit when the mapping was added
+        self.competencies: list[tuple[str, Competency]] = []
+        self.competency_types: set[str] = set()
+
+        predefined_values = {}
+        for source, target in mappings:
+            if isinstance(target, Competency):
+                self.competencies.append((source, target))
+                self.competency_types.add(source)
+                continue
+
+            field_name = target.split(" / ", 1)[1]
+            if source in PREDEFINED_VALUES_GENERATORS:
+                if source not in predefined_values:
+                    predefined_values[source] = PREDEFINED_VALUES_GENERATORS[source]()
+                self.account_fields.append((None, None, field_name, predefined_values[source]))
+            else:
+                row_type, row_subtype_from_to = source.split(" / ", 1)
+                self.account_fields.append((row_type, row_subtype_from_to, field_name, None))
+
+    def account_field_names(self):
+        return {field_name for _, _, field_name, _ in self.account_fields}
+
+    def has_competency_rows(self, rows_by_type):
+        return not self.competency_types.isdisjoint(rows_by_type)
@@ -0,0 +1,204 @@
+"""
+Opt-in profiling of sync runs, so a slow run on a club PC can be captured and sent to us.
+
+Enabled with "profile" in config.json or the QUALSSYNC_PROFILE environment variable
+("1"/"sampling" or "cprofile"). Each profiled call writes two files to the profile folder:
+
+- sampling (default): <name>-<time>.folded, stacks of every thread the run uses in the
+  folded format flame graph tools (speedscope, flamegraph.pl) read, and <name>-<time>.txt
+  with the hottest functions.
+- cprofile: <name>-<time>.prof for pstats/snakeviz and the .txt summary. Only the calling
+  thread is profiled, so use upload_concurrency 1 with it.
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import config as app_config
+
+ENV_FLAG = "QUALSSYNC_PROFILE"
+MODES = ("sampling", "cprofile")
+
+# profiled calls don't nest (cProfile can't), an inner profiled call just runs
+_active = threading.local()
+
+
+def profiled(name):
+    """Decorates a SyncService method to be profiled when profiling is enabled."""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = _profiler_for(self.config, name)
+            if profiler is None:
+                return method(self, *args, **kwargs)
+            with profiler:
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def profile_mode(config):
+    """"sampling", "cprofile" or None, from the environment first, then config.json."""
+    value = os.environ.get(ENV_FLAG)
+    if value is None:
+        value = config.get("profile", False)
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in MODES:
+            return value
+        value = value not in ("", "0", "false", "no", "off")
+    return "sampling" if value else None
+
+
+def profile_dir(config):
+    """profile_dir if set, else a profiles folder next to the log file (or next to config.json)."""
+    if config.get("profile_dir"):
+        return config["profile_dir"]
+    anchor = config.get("log_file") or app_config.CONFIG_FILE
+    return os.path.join(os.path.dirname(os.path.abspath(anchor)), "profiles")
+
+
+def _profiler_for(config, name):
+    mode = profile_mode(config)
+    if mode is None or getattr(_active, "profiling", False):
+        return None
+    profiler_class = CProfileRun if mode == "cprofile" else SamplingRun
+    return profiler_class(name, profile_dir(config), int(config.get("profile_top", 30)))
+
+
+class _ProfileRun:
+    """Profiles one with block and writes the data file plus the text summary on exit."""
+
+    data_suffix = ""
+
+    def __init__(self, name, directory, top):
+        self.name = name
+        self.directory = directory
+        self.top = top
+        self.paths = []
+
+    def __enter__(self):
+        _active.profiling = True
+        self.started_at = datetime.now()
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.stop()
+            self.save(exc_type)
+        except OSError as e:
+            print(f"Could not save the profile of {self.name}: {e}", file=sys.stderr)
+        finally:
+            _active.profiling = False
+        return False
+
+    def save(self, exc_type):
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"{self.name}-{self.started_at:%Y%m%d-%H%M%S}")
+        data_path, text_path = base + self.data_suffix, base + ".txt"
+        self.write_data(data_path)
+        header = f"{self.name} started {self.started_at:%Y-%m-%d %H:%M:%S}"
+        if exc_type is not None:
+            header += f", ended with {exc_type.__name__}"
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write(header + "\n\n" + self.summary())
+        self.paths = [data_path, text_path]
+        print(f"Profile of {self.name} saved to {text_path}", file=sys.stderr)
+
+
+class CProfileRun(_ProfileRun):
+    """Deterministic: every call in the calling thread, with exact call counts."""
+
+    data_suffix = ".prof"
+
+    def start(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write_data(self, path):
+        self.profile.dump_stats(path)
+
+    def summary(self):
+        out = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=out).strip_dirs()
+        stats.sort_stats("cumulative").print_stats(self.top)
+        stats.sort_stats("tottime").print_stats(self.top)
+        return out.getvalue()
+
+
+class SamplingRun(_ProfileRun):
+    """
+    Statistical: a background thread records the stacks of the calling thread and of every
+    thread started during the run (the upload workers) every INTERVAL seconds. Waiting on the
+    network shows up too, which is usually what a slow sync is spending its time on.
+    """
+
+    INTERVAL = 0.005
+    data_suffix = ".folded"
+
+    def start(self):
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self._owner = threading.get_ident()
+        # threads that were already running (e.g. the Tk main loop) aren't part of the run
+        self._ignored = set(sys._current_frames()) - {self._owner}
+        self._stop = threading.Event()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="qualssync-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self._started
+
+    def _sample(self):
+        ignored = self._ignored | {threading.get_ident()}
+        while not self._stop.wait(self.INTERVAL):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in ignored:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[("main" if thread_id == self._owner else "worker",) + tuple(stack)] += 1
+
+    def write_data(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(";".join(part.replace(";", ",") for part in stack) + f" {count}\n")
+
+    def summary(self):
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for function in set(stack[1:]):
+                total[function] += count
+        thread_samples = sum(self.stacks.values())
+        lines = [
+            f"{self.seconds:.2f} s, {self.samples} samples every {self.INTERVAL * 1000:.0f} ms, "
+            f"{thread_samples} thread stacks",
+            "",
+        ]
+        for title, counter in (("Most time inside the function itself", own),
+                               ("Most time including called functions", total)):
+            lines.append(f"{title} (% of thread stacks):")
+            for function, count in counter.most_common(self.top):
+                lines.append(f"{100 * count / max(thread_samples, 1):6.1f}%  {function}")
+            lines.append("")
+        return "\n".join(lines)
@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+THROTTLE_STATUSES = (429, 503)
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+class AdaptiveLimit:
+    """
+    AIMD concurrency window for one class of requests: every healthy response widens the
+    window by about one request per round trip, a throttled or failed response (or latency
+    well above its long-term average) halves it, at most once per round trip.
+    Threads wait in acquire(), coroutines in acquire_async(); both share the same window.
+    """
+
+    FAST_ALPHA = 0.3   # smoothing of the recent latency
+    SLOW_ALPHA = 0.05  # smoothing of the long-term latency it is compared with
+
+    def __init__(self, maximum, latency_tolerance=2.0, adaptive=True):
+        self.maximum = max(int(maximum), 1)
+        self.limit = float(self.maximum)
+        self.latency_tolerance = latency_tolerance
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self.recent_latency = None
+        self.usual_latency = None
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters = []  # (event loop, future) of coroutines waiting for a slot
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        """acquire() for coroutines: waits on the event loop instead of blocking its thread."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, latency, throttled):
+        """latency is None when it shouldn't count (failed or retried requests)."""
+        with self._cond:
+            self.in_flight -= 1
+            if self.adaptive:
+                if latency is not None:
+                    self._observe_latency(latency)
+                if throttled or self._latency_degraded():
+                    self._decrease()
+                else:
+                    self.limit = min(self.limit + 1 / self.limit, self.maximum)
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def _observe_latency(self, latency):
+        if self.recent_latency is None:
+            self.recent_latency = self.usual_latency = latency
+            return
+        self.recent_latency += self.FAST_ALPHA * (latency - self.recent_latency)
+        self.usual_latency += self.SLOW_ALPHA * (latency - self.usual_latency)
+
+    def _latency_degraded(self):
+        if not self.latency_tolerance or self.recent_latency is None:
+            return False
+        return self.recent_latency > self.usual_latency * self.latency_tolerance
+
+    def _decrease(self):
+        # requests already in flight answer with the same verdict, so only react once per round trip
+        now = time.monotonic()
+        if now - self._last_decrease < (self.recent_latency or 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.limit / 2, 1.0)
+
+
+def _wake(waiter):
+    if not waiter.done():  # a cancelled waiter stays cancelled
+        waiter.set_result(None)
+
+
+class RateLimiter:
+    """
+    Client-side rate control shared by all ApiClient and AsyncApiClient calls: an optional
+    requests-per-second cap over all endpoints, plus separate adaptive concurrency windows for
+    reads (GET) and writes (assign/revoke POST, account PUT), so throttled writes don't slow
+    down the prefetch.
+    """
+
+    def __init__(self, max_rps=None, max_concurrency=1, adaptive=True, latency_tolerance=2.0):
+        self.max_rps = float(max_rps) if max_rps else None
+        self.adaptive = adaptive
+        self.limits = {
+            kind: AdaptiveLimit(max_concurrency, latency_tolerance, adaptive)
+            for kind in ("read", "write")
+        }
+        self._next_slot = 0.0
+        self._rate_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, max_concurrency):
+        """The limiter the http_* settings in config.json describe."""
+        return cls(
+            max_rps=config.get("http_max_rps"),
+            max_concurrency=max_concurrency,
+            adaptive=config.get("http_adaptive_concurrency", True),
+            latency_tolerance=float(config.get("http_latency_tolerance", 2.0)),
+        )
+
+    @contextmanager
+    def request(self, method, url):
+        """
+        Waits for a free slot, then yields a RateLimitedCall; call observe(response) on it
+        inside the with block so throttling is fed back into the window.
+        """
+        method = method.upper()
+        kind = "write" if method in WRITE_METHODS else "read"
+        limit = self.limits[kind]
+        if self.adaptive:
+            limit.acquire()
+        call = RateLimitedCall()
+        try:
+            self._wait_for_rate()
+            start = time.monotonic()
+            try:
+                yield call
+            except Exception:
+                call.failed = True
+                raise
+            finally:
+                call.latency = time.monotonic() - start
+        finally:
+            if self.adaptive:
+                limit.release(call.latency if call.healthy else None, not call.healthy)
+
+    @asynccontextmanager
+    async def request_async(self, method, url):
+        """request() for coroutines, one attempt per call (AsyncApiClient retries itself)."""
+        limit = self.limits["write" if method.upper() in WRITE_METHODS else "read"]
+        if self.adaptive:
+            await limit.acquire_async()
+        call = RateLimitedCall()
+        try:
+            delay = self._reserve_slot()
+            if delay:
+                await asyncio.sleep(delay)
+            start = time.monotonic()
+            try:
+                yield call
+            except Exception:
+                call.failed = True
+                raise
+            finally:
+                call.latency = time.monotonic() - start
+        finally:
+            if self.adaptive:
+                limit.release(call.latency if call.healthy else None, not call.healthy)
+
+    def _wait_for_rate(self):
+        delay = self._reserve_slot()
+        if delay:
+            time.sleep(delay)
+
+    def _reserve_slot(self):
+        """Books the next request slot under max_rps; returns how long to wait for it."""
+        if not self.max_rps:
+            return 0
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1 / self.max_rps
+        return slot - now
+
+
+class RateLimitedCall:
+    """What RateLimiter learned about one call, including the attempts urllib3 retried."""
+
+    __slots__ = ("status", "throttled", "retried", "failed", "latency")
+
+    def __init__(self):
+        self.status = None
+        self.throttled = 0
+        self.retried = 0
+        self.failed = False
+        self.latency = None
+
+    def observe(self, response):
+        self.status = response.status_code
+        retries = getattr(getattr(response, "raw", None), "retries", None)
+        history = getattr(retries, "history", ()) or ()
+        self.retried = len(history)
+        self.throttled = sum(1 for attempt in history if attempt.status in THROTTLE_STATUSES)
+        self.throttled += self.status in THROTTLE_STATUSES
+
+    def observe_status(self, status):
+        """observe() for a single attempt without urllib3 retries; a 5xx counts as failed."""
+        self.status = status
+        self.throttled = int(status in THROTTLE_STATUSES)
+        self.failed = self.failed or status >= 500
+
+    @property
+    def healthy(self):
+        return not self.failed and not self.throttled and not self.retried
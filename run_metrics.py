@@ -0,0 +1,123 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class RunMetrics:
+    """
+    Where the time of a sync run went: seconds per phase (reading Excel, fetching accounts,
+    prefetching competencies, planning, uploading...) and, per API endpoint, request counts,
+    latency percentiles, bytes sent/received, retries and errors.
+    Shared by SyncService, ExcelLoader and the API clients; thread-safe.
+    """
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = datetime.now().astimezone()
+            self.phases: dict[str, float] = {}
+            self._endpoints: dict[str, dict] = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Adds the time spent in the with block to the phase (a phase can be entered many times)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def record_request(self, endpoint, seconds, status=None, bytes_sent=0, bytes_received=0, retries=0):
+        """status None means no response at all (connection error, timeout)."""
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                "latencies": [], "statuses": Counter(), "retries": 0, "bytes_sent": 0, "bytes_received": 0,
+            })
+            stats["latencies"].append(seconds)
+            stats["statuses"][str(status) if status is not None else "failed"] += 1
+            stats["retries"] += retries
+            stats["bytes_sent"] += bytes_sent
+            stats["bytes_received"] += bytes_received
+
+    def report(self):
+        """The run as a JSON-serialisable dict."""
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in sorted(self._endpoints.items()):
+                latencies = sorted(stats["latencies"])
+                endpoints[endpoint] = {
+                    "requests": len(latencies),
+                    "errors": sum(n for status, n in stats["statuses"].items() if status == "failed" or int(status) >= 400),
+                    "statuses": dict(stats["statuses"]),
+                    "retries": stats["retries"],
+                    "bytes_sent": stats["bytes_sent"],
+                    "bytes_received": stats["bytes_received"],
+                    **{f"p{p}_ms": round(self._percentile(latencies, p) * 1000, 1) for p in self.PERCENTILES},
+                    "max_ms": round(latencies[-1] * 1000, 1),
+                    "total_seconds": round(sum(latencies), 3),
+                }
+            phases = {name: round(seconds, 3) for name, seconds in self.phases.items()}
+            all_latencies = sorted(latency for stats in self._endpoints.values() for latency in stats["latencies"])
+        totals = {
+            key: sum(stats[key] for stats in endpoints.values())
+            for key in ("requests", "errors", "retries", "bytes_sent", "bytes_received")
+        }
+        totals.update({f"p{p}_ms": round(self._percentile(all_latencies, p) * 1000, 1) for p in self.PERCENTILES})
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now().astimezone().isoformat(),
+            "phase_seconds": phases,
+            "total_phase_seconds": round(sum(phases.values()), 3),
+            "requests": totals,
+            "endpoints": endpoints,
+        }
+
+    def summary(self, report=None):
+        """One line for the log, e.g. "Timing: 4.2 s (compare 3.1 s, ...); 312 requests, p95 85 ms, ..."."""
+        report = report or self.report()
+        phases = ", ".join(
+            f"{name} {seconds:.1f} s"
+            for name, seconds in sorted(report["phase_seconds"].items(), key=lambda item: item[1], reverse=True)
+        )
+        totals = report["requests"]
+        received = totals["bytes_received"] / 1024
+        return (
+            f"Timing: {report['total_phase_seconds']:.1f} s ({phases or 'no phases'}); "
+            f"{totals['requests']} requests, p50 {totals['p50_ms']:.0f} ms, p95 {totals['p95_ms']:.0f} ms, "
+            f"{totals['retries']} retries, {totals['errors']} errors, {received:.0f} KB received"
+        )
+
+    def write_report(self, directory, extra=None):
+        """Writes the report (plus the extra keys) to run-<start time>.json in directory; returns the path."""
+        report = {**(extra or {}), **self.report()}
+        os.makedirs(directory, exist_ok=True)
+        name = f"run-{self.started_at:%Y%m%d-%H%M%S}"
+        path = os.path.join(directory, f"{name}.json")
+        suffix = 1
+        while os.path.exists(path):  # two runs started within the same second
+            suffix += 1
+            path = os.path.join(directory, f"{name}-{suffix}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return path
+
+    @staticmethod
+    def _percentile(sorted_values, percent):
+        # nearest-rank, so every reported value is a latency that actually happened
+        if not sorted_values:
+            return 0.0
+        return sorted_values[max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)]
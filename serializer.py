@@ -4,7 +4,7 @@ import json
 
 class Serializer:
     @staticmethod
-    def serialize(mappings, path):
+    def to_list(mappings):
         serializable = []
         for source, target in mappings:
             if isinstance(target, Competency):
@@ -12,8 +12,12 @@ class Serializer:
             else:
                 target_data = {"__type__": "str", "value": target}
             serializable.append({"source": source, "target": target_data})
+        return serializable
+
+    @staticmethod
+    def serialize(mappings, path):
         with open(path, "w", encoding="utf-8") as f:
-            json.dump(serializable, f, indent=2)
+            json.dump(Serializer.to_list(mappings), f, indent=2)
 
     @staticmethod
     def deserialize(path):
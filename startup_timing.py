@@ -0,0 +1,59 @@
+"""
+Opt-in startup timing report: set QUALSSYNC_STARTUP_TIMING=1 to print how long each module took
+to import and when the main milestones (window built, first paint) were reached, so startup
+regressions in the frozen build are visible without a development setup.
+"""
+import builtins
+import os
+import sys
+import time
+
+ENV_FLAG = "QUALSSYNC_STARTUP_TIMING"
+
+_started_at = time.perf_counter()
+_enabled = False
+_import_times: dict[str, float] = {}
+_marks: list[tuple[str, float]] = []
+_original_import = builtins.__import__
+
+
+def is_enabled():
+    return _enabled
+
+
+def start():
+    """Starts recording if the environment flag is set; call before the heavy imports."""
+    global _enabled
+    if _enabled or os.environ.get(ENV_FLAG, "") in ("", "0"):
+        return
+    _enabled = True
+    builtins.__import__ = _timed_import
+
+
+def mark(label):
+    if _enabled:
+        _marks.append((label, time.perf_counter() - _started_at))
+
+
+def report(top=15, file=None):
+    """Prints the milestones and the slowest imports (cumulative, i.e. including what they import)."""
+    if not _enabled:
+        return
+    builtins.__import__ = _original_import
+    file = file or sys.stderr
+    print("----- startup timing -----", file=file)
+    for label, elapsed in _marks:
+        print(f"{elapsed * 1000:9.1f} ms  {label}", file=file)
+    print(f"slowest imports (top {top}):", file=file)
+    for name, elapsed in sorted(_import_times.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{elapsed * 1000:9.1f} ms  {name}", file=file)
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    begin = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_times.setdefault(name, time.perf_counter() - begin)
@@ -0,0 +1,153 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from assigned_competency import AssignedCompetency
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    membership INTEGER PRIMARY KEY,
+    pilot_id INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS accounts_pilot_id ON accounts (pilot_id);
+-- pilots whose competencies were read, so "none assigned" differs from "never read"
+CREATE TABLE IF NOT EXISTS competency_reads (
+    pilot_id INTEGER PRIMARY KEY,
+    read_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS assigned_competencies (
+    pilot_id INTEGER NOT NULL,
+    competency_id INTEGER NOT NULL,
+    date_assigned TEXT,
+    date_valid_to TEXT,
+    PRIMARY KEY (pilot_id, competency_id)
+);
+CREATE INDEX IF NOT EXISTS assigned_competencies_competency ON assigned_competencies (competency_id);
+"""
+
+
+class StateMirror:
+    """
+    Local SQLite copy of the Gliding App state we last read or wrote: accounts (projected to the
+    mapped data fields) and each pilot's assigned competencies with their dates. It lets a
+    check-only run compare without any request. The mirror belongs to one server; pointing
+    it at another one empties it.
+    """
+
+    def __init__(self, path, server):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # shared by the upload workers, serialised by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+            if self._get_meta("server") != server:
+                self._conn.execute("DELETE FROM accounts")
+                self._conn.execute("DELETE FROM competency_reads")
+                self._conn.execute("DELETE FROM assigned_competencies")
+                self._set_meta("server", server)
+                self._set_meta("accounts_read_at", None)
+                self._set_meta("account_fields", None)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def has_accounts(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM accounts LIMIT 1").fetchone() is not None
+
+    def accounts_read_at(self):
+        with self._lock:
+            return self._get_meta("accounts_read_at")
+
+    def account_fields(self):
+        """The data fields the stored accounts were projected to, or None if they weren't."""
+        with self._lock:
+            fields = self._get_meta("account_fields")
+        return set(json.loads(fields)) if fields else None
+
+    def accounts_map(self):
+        """Membership number → account dict, in the shape ApiClient.fetch_accounts_map returns."""
+        with self._lock:
+            rows = self._conn.execute("SELECT membership, pilot_id, data FROM accounts").fetchall()
+        return {
+            membership: {"id": pilot_id, "lid_nummer": str(membership), "data": json.loads(data)}
+            for membership, pilot_id, data in rows
+        }
+
+    def pilot_competencies(self):
+        """pilot_id → {competency_id: AssignedCompetency} for every pilot whose competencies were read."""
+        with self._lock:
+            read = self._conn.execute("SELECT pilot_id FROM competency_reads").fetchall()
+            rows = self._conn.execute(
+                "SELECT pilot_id, competency_id, date_assigned, date_valid_to FROM assigned_competencies"
+            ).fetchall()
+        competencies = {pilot_id: {} for pilot_id, in read}
+        for pilot_id, competency_id, date_assigned, date_valid_to in rows:
+            if pilot_id in competencies:
+                competencies[pilot_id][competency_id] = AssignedCompetency(competency_id, date_assigned, date_valid_to, pilot_id)
+        return competencies
+
+    def store_accounts(self, account_map, fields=None):
+        """Replaces all accounts with account_map (membership → account dict), projected to fields."""
+        rows = [
+            (int(membership), account["id"], json.dumps(account.get("data") or {}))
+            for membership, account in account_map.items()
+            if account.get("id")
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM accounts")
+            self._conn.executemany("INSERT INTO accounts (membership, pilot_id, data) VALUES (?, ?, ?)", rows)
+            self._set_meta("accounts_read_at", datetime.now().astimezone().isoformat(timespec="seconds"))
+            self._set_meta("account_fields", json.dumps(sorted(fields)) if fields is not None else None)
+
+    def store_account_data(self, membership, pilot_id, data):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO accounts (membership, pilot_id, data) VALUES (?, ?, ?)",
+                (int(membership), pilot_id, json.dumps(data)),
+            )
+
+    def store_pilot_competencies(self, pilot_competencies):
+        """Replaces the competencies of the pilots in pilot_competencies (pilot_id → {id: AssignedCompetency})."""
+        read_at = datetime.now().astimezone().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            for pilot_id, competencies in pilot_competencies.items():
+                self._conn.execute("DELETE FROM assigned_competencies WHERE pilot_id = ?", (pilot_id,))
+                self._conn.executemany(
+                    "INSERT INTO assigned_competencies (pilot_id, competency_id, date_assigned, date_valid_to) VALUES (?, ?, ?, ?)",
+                    [(pilot_id, comp.id, comp.date_assigned, comp.date_valid_to) for comp in competencies.values()],
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO competency_reads (pilot_id, read_at) VALUES (?, ?)",
+                [(pilot_id, read_at) for pilot_id in pilot_competencies],
+            )
+
+    def store_assignment(self, pilot_id, competency_id, date_assigned, date_valid_to):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO assigned_competencies (pilot_id, competency_id, date_assigned, date_valid_to) VALUES (?, ?, ?, ?)",
+                (pilot_id, competency_id, date_assigned, date_valid_to),
+            )
+
+    def store_revocation(self, pilot_id, competency_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM assigned_competencies WHERE pilot_id = ? AND competency_id = ?",
+                (pilot_id, competency_id),
+            )
+
+    def _get_meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
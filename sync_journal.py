@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+from sync_plan import SyncPlan
+
+
+class SyncJournal:
+    """
+    Write-ahead journal of an upload, so an interrupted sync (cancelled, crashed, laptop asleep)
+    can be resumed. Every write is recorded as "started" before it is sent and "done" once the
+    server confirmed it; a pilot is "done" when all of its writes were confirmed.
+    The plan being uploaded is recorded first, so a resumed run continues it without comparing
+    again: it skips done pilots and done writes, and redoes writes that were only started.
+
+    One JSON object per line, flushed as it is written; a torn last line is ignored on load.
+    The file is keyed by the export and mapping hashes, so a different export or changed
+    mappings start a fresh journal. It is deleted once the upload ran to completion, even with
+    failed writes (the next upload compares everything again); only an interrupted upload keeps it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done_pilots: set[str] = set()
+        self.done_operations: dict[str, set[str]] = {}
+        self.started_operations: dict[str, set[str]] = {}
+        self.plan: SyncPlan | None = None
+        # members the plan's comparison covered and left out as in sync (delta mode);
+        # None when the plan wasn't compared in that run (e.g. loaded from a file)
+        self.compared_members: set[str] | None = None
+        self.skipped_members: set[str] = set()
+        self._lock = threading.Lock()
+        self._file = None
+        self._load()
+
+    @classmethod
+    def open(cls, directory, export_hash, mapping_hash, max_age_hours=None):
+        """The journal for this export and mappings; one older than max_age_hours is discarded."""
+        path = os.path.join(directory, f"{export_hash[:16]}-{mapping_hash[:16]}.jsonl")
+        if max_age_hours is not None and os.path.exists(path):
+            if time.time() - os.path.getmtime(path) > max_age_hours * 3600:
+                os.remove(path)  # the server may have changed since, compare everything again
+        return cls(path)
+
+    @staticmethod
+    def operation_key(op):
+        return f"{op.action}:{op.competency.id if op.competency else ''}"
+
+    def is_pilot_done(self, membership):
+        return str(membership) in self.done_pilots
+
+    def is_operation_done(self, membership, op):
+        return self.operation_key(op) in self.done_operations.get(str(membership), ())
+
+    def unconfirmed_operations(self):
+        """Writes that were sent but never confirmed; they are redone on resume."""
+        return sum(
+            len(keys - self.done_operations.get(membership, set()))
+            for membership, keys in self.started_operations.items()
+            if membership not in self.done_pilots
+        )
+
+    def plan_started(self, plan, compared_members=None, skipped_members=()):
+        """Records the plan this upload executes; a later plan_started supersedes it."""
+        self._append({
+            "event": "plan",
+            "plan": plan.to_dict(),
+            "compared": sorted(compared_members) if compared_members is not None else None,
+            "skipped": sorted(skipped_members),
+        }, sync=True)
+        with self._lock:
+            self.plan = plan
+            self.compared_members = set(compared_members) if compared_members is not None else None
+            self.skipped_members = set(skipped_members)
+
+    def operation_started(self, membership, op):
+        self._append({"event": "started", "membership": str(membership), "operation": self.operation_key(op)})
+
+    def operation_done(self, membership, op):
+        key = self.operation_key(op)
+        self._append({"event": "done", "membership": str(membership), "operation": key})
+        with self._lock:
+            self.done_operations.setdefault(str(membership), set()).add(key)
+
+    def pilot_done(self, membership):
+        self._append({"event": "pilot_done", "membership": str(membership)}, sync=True)
+        with self._lock:
+            self.done_pilots.add(str(membership))
+
+    def close(self):
+        """Closes the journal and keeps it, for an interrupted upload to be resumed."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def finish(self):
+        """Closes and deletes the journal of an upload that ran to completion."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _append(self, record, sync=False):
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn write from the interrupted run
+            membership = record.get("membership")
+            if record.get("event") == "plan":
+                self._load_plan(record)
+            elif record.get("event") == "pilot_done":
+                self.done_pilots.add(membership)
+            elif record.get("event") == "done":
+                self.done_operations.setdefault(membership, set()).add(record["operation"])
+            elif record.get("event") == "started":
+                self.started_operations.setdefault(membership, set()).add(record["operation"])
+
+    def _load_plan(self, record):
+        try:
+            plan = SyncPlan.from_dict(record["plan"])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return  # written by another version, the resumed run compares again
+        self.plan = plan
+        compared = record.get("compared")
+        self.compared_members = set(compared) if compared is not None else None
+        self.skipped_members = set(record.get("skipped") or ())
@@ -0,0 +1,108 @@
+import json
+from datetime import date
+from competency import Competency
+
+
+class PlanOperation:
+    """
+    One write the sync would make for a pilot: an account "put", or a competency "assign"/"revoke".
+    before/after hold the server value and the new value, so a plan can be reviewed without re-comparing.
+    """
+
+    def __init__(self, action, competency=None, before=None, after=None):
+        self.action = action
+        self.competency = competency
+        self.before = before
+        self.after = after
+
+    def __repr__(self):
+        return f"PlanOperation(action={self.action!r}, competency={self.competency!r}, before={self.before}, after={self.after})"
+
+    def to_dict(self):
+        return {
+            "action": self.action,
+            "competency": self.competency.to_dict() if self.competency else None,
+            "before": self.before,
+            "after": self.after,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        competency = Competency.from_dict(data["competency"]) if data.get("competency") else None
+        return cls(data["action"], competency, data.get("before"), data.get("after"))
+
+
+class PilotPlan:
+    """
+    The operations planned for one pilot, in execution order (account put first, then competencies).
+    notes are the log records produced while planning (e.g. skipped medical fields), replayed on execution.
+    """
+
+    def __init__(self, pilot_id, name, membership, operations=None, notes=None):
+        self.pilot_id = pilot_id
+        self.name = name
+        self.membership = membership
+        self.operations: list[PlanOperation] = operations or []
+        self.notes: list[tuple[str, str | None]] = notes or []
+
+    def __repr__(self):
+        return f"PilotPlan(pilot_id={self.pilot_id!r}, name={self.name!r}, operations={self.operations})"
+
+    def to_dict(self):
+        return {
+            "pilot_id": self.pilot_id,
+            "name": self.name,
+            "membership": self.membership,
+            "operations": [op.to_dict() for op in self.operations],
+            "notes": [list(note) for note in self.notes],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["pilot_id"], data["name"], data["membership"],
+            [PlanOperation.from_dict(op) for op in data.get("operations", [])],
+            [tuple(note) for note in data.get("notes", [])],
+        )
+
+
+class SyncPlan:
+    """
+    Everything a sync would change, computed once and executable without recomparing.
+    as_of is the day its date rules were evaluated for (None for plans saved before it was recorded);
+    offline plans were compared with the state mirror and are compared again live before uploading.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, pilots=None, as_of=None, offline=False):
+        self.pilots: list[PilotPlan] = pilots or []
+        self.as_of: date | None = as_of
+        self.offline = offline
+
+    def __len__(self):
+        return sum(len(pilot.operations) for pilot in self.pilots)
+
+    def to_dict(self):
+        return {
+            "version": self.FORMAT_VERSION,
+            "as_of": self.as_of.isoformat() if self.as_of else None,
+            "offline": self.offline,
+            "pilots": [pilot.to_dict() for pilot in self.pilots],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported sync plan version: {data.get('version')}")
+        as_of = date.fromisoformat(data["as_of"]) if data.get("as_of") else None
+        return cls([PilotPlan.from_dict(pilot) for pilot in data.get("pilots", [])], as_of, data.get("offline", False))
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
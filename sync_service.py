@@ -1,11 +1,23 @@
-import config
-from datetime import datetime
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import config as app_config
 from api_client import ApiClient
 from excel_loader import ExcelLoader
 from competency import Competency
 from serializer import Serializer
 from assigned_competency import AssignedCompetency
-from hardcoded_rules import apply_medical_check_rule, should_assign_competency_based_on_dates
+from mapping_table import MappingTable
+from sync_plan import SyncPlan, PilotPlan, PlanOperation
+from hardcoded_rules import RulesEngine
+from run_metrics import RunMetrics
+from profiling import profiled
+from sync_journal import SyncJournal
+from state_mirror import StateMirror
+from export_fingerprint import ExportFingerprint
 
 class CancelledByUserError(Exception):
     """Custom exception for when the user cancels an operation."""
@@ -14,18 +26,36 @@ class CancelledByUserError(Exception):
 class SyncService:
     def __init__(self, config):
         self.config = config
-        self.api = ApiClient(config)
-        self.excel_loader = ExcelLoader(config)
+        # timings since the last run report, shared with the API client and the Excel loader
+        self.metrics = RunMetrics()
+        self.api = ApiClient(config, self.metrics)
+        self.excel_loader = ExcelLoader(config, self.metrics)
 
         # Data state
         self.mappings: list[tuple[str, str | Competency]] = []
         self.pilots: list[tuple[str, str, str]] = []
         self.account_map: dict[int, dict] = {}
+        # pilot_id → competencies currently assigned on the server, filled by prefetch_pilot_competencies
+        self.pilot_competencies: dict[int, dict[int, AssignedCompetency]] = {}
+        self.last_plan: SyncPlan | None = None
+        self.mapping_table: MappingTable | None = None
+        self.rules: RulesEngine | None = None
+        self.state_mirror: StateMirror | None = None  # opened on first use, see _mirror()
+        # delta mode: an earlier export to diff against (instead of the saved fingerprint),
+        # and the members the last compare left out because they are known to be in sync
+        self.delta_baseline: ExportFingerprint | None = None
+        self.skipped_in_sync: set[str] = set()
+        # memberships the last build_plan compared, with or without changes
+        self.compared_members: set[str] = set()
+        self._compared_plan: SyncPlan | None = None
+        self._failed_pilots: set[str] = set()
 
+    @profiled("load_excel_data")
     def load_excel_data(self, fpath, cancel_event=None):
         if cancel_event and cancel_event.is_set():
             raise CancelledByUserError("Operation cancelled by user.")
         self.excel_loader.load_excel(fpath)
+        self.last_plan = None  # compared against the previous export
 
         base_items = sorted({row["type"] for row in self.excel_loader.rows})
         source_items = []
@@ -35,13 +65,19 @@ class SyncService:
 
         if cancel_event and cancel_event.is_set():
             raise CancelledByUserError("Operation cancelled by user.")
-        self.account_map = self.api.fetch_accounts_map()
+        with self.metrics.phase("fetch_accounts"):
+            mirror = self._mirror() if self.config.get("offline_compare", False) else None
+            if mirror and mirror.has_accounts():
+                self.account_map = mirror.accounts_map()
+            else:
+                self.account_map = self.api.fetch_accounts_map()
 
         seen = set()
         pilots = []
-        for i, row in enumerate(self.excel_loader.rows):
+        for i, rows_by_type in enumerate(self.excel_loader.rows_by_member.values()):
             if cancel_event and i % 50 == 0 and cancel_event.is_set():
                 raise CancelledByUserError("Operation cancelled by user.")
+            row = next(iter(rows_by_type.values()))[0]
             membership = int(row["membership"])
             name = row["name"]
             if membership not in seen:
@@ -53,14 +89,26 @@ class SyncService:
         self.pilots = pilots
         return source_items, self.pilots
 
+    def load_previous_export(self, fpath):
+        """
+        Delta mode against an earlier export instead of the fingerprint of the last upload.
+        That export is assumed to have been fully synced on the day the file was last modified.
+        """
+        loader = ExcelLoader(self.config, self.metrics)
+        loader.load_excel(fpath)
+        self.delta_baseline = ExportFingerprint(loader.member_hashes(), date.fromtimestamp(os.path.getmtime(fpath)))
+
+    @profiled("load_target_tree")
     def load_target_tree(self, cancel_event=None):
         if cancel_event and cancel_event.is_set():
             raise CancelledByUserError("Operation cancelled by user.")
-        accounts = self.api.load_account_leaves()
+        with self.metrics.phase("fetch_accounts"):
+            accounts = self.api.load_account_leaves()
         
         if cancel_event and cancel_event.is_set():
             raise CancelledByUserError("Operation cancelled by user.")
-        competencies = self.api.load_competencies_subtree()
+        with self.metrics.phase("fetch_competencies"):
+            competencies = self.api.load_competencies_subtree()
         tree = {}
         if accounts:
             tree["Accounts"] = accounts
@@ -75,6 +123,8 @@ class SyncService:
                 source_text = source_text[:source_text.rfind(" / ")]
 
         self.mappings.append((source_text, target_item))
+        self.mapping_table = None
+        self.last_plan = None
 
     def get_mappings_for_display(self):
         display_list = []
@@ -89,36 +139,237 @@ class SyncService:
     def delete_mapping(self, index):
         if 0 <= index < len(self.mappings):
             del self.mappings[index]
+            self.mapping_table = None
+            self.last_plan = None
 
     def save_mappings(self, path):
         Serializer.serialize(self.mappings, path)
 
     def load_mappings(self, path):
         self.mappings = Serializer.deserialize(path)
+        self.mapping_table = None
+        self.last_plan = None
         
-    def upload_data(self, check_only=False, log_callback=lambda msg, tag=None: None, cancel_event=None):
-        successful_updates = 0
-        for name, membership, _ in self.pilots:
-            if cancel_event and cancel_event.is_set():
-                raise CancelledByUserError("Operation cancelled by user.")
+    @profiled("upload_data")
+    def upload_data(self, check_only=False, log_callback=lambda msg, tag=None: None, cancel_event=None, plan=None, as_of=None, full_resync=False):
+        """
+        Compares (check_only) or uploads. Without a plan, a fresh SyncPlan is computed first (as of
+        today, or the as_of date); a check-only run keeps its plan in last_plan so it can be applied
+        without comparing again. Loading another export, changing the mappings or uploading drops it.
+        Uploads are journaled: if an earlier upload of the same export and mappings was interrupted,
+        its plan is continued without comparing again, skipping the pilots and writes it finished
+        (with full_resync, or a plan from another day, only the unfinished pilots are compared).
+        With offline_compare, the comparison runs against the state mirror; an upload then re-checks
+        only the pilots with changes against the server (unless offline_revalidate is off).
+        In delta mode only members that changed since the last upload are compared, unless full_resync.
+        Only plans for today can be uploaded; as_of (or a plan for another day) is for comparing.
+        """
+        revalidate = False
+        if not check_only:
+            planned_for = as_of or (plan.as_of if plan is not None else None)
+            if planned_for is not None and planned_for != date.today():
+                raise ValueError(f"A plan as of {planned_for} can only be compared, not uploaded. Compare again as of today.")
+            revalidate = plan is not None and plan.offline and self.config.get("offline_revalidate", True)
+            if revalidate and plan is not self._compared_plan:
+                raise ValueError("This plan was compared with the local copy of Gliding App data. Compare again before uploading it.")
+            self.last_plan = None  # its "before" values won't match the server any more
+        journal = None if check_only else self._open_journal(plan, log_callback)
+        resumed = self._journaled_plan(journal, log_callback) if plan is None and not full_resync else None
+        if resumed is not None:
+            plan = resumed
+        elif plan is None:
+            skip = journal.done_pilots if journal else ()
+            plan = self.compare(cancel_event, as_of, skip, revalidate=not check_only, log_callback=log_callback, full_resync=full_resync)
+        elif revalidate:
+            plan = self._revalidate(plan, cancel_event, log_callback, journal.done_pilots if journal else ())
+        if check_only:
+            self.last_plan = plan
+        elif journal and resumed is None:
+            compared = self.compared_members if plan is self._compared_plan else None
+            journal.plan_started(plan, compared, self.skipped_in_sync if compared is not None else ())
+        try:
+            successful_updates = self.execute_plan(plan, check_only, log_callback, cancel_event, journal)
+        except BaseException:
+            if journal:
+                journal.close()  # interrupted: the next upload resumes from it
+            raise
+        if journal:
+            journal.finish()
+        if not check_only:
+            self._save_fingerprint(plan, journal, log_callback)
 
-            account = self.account_map.get(int(membership))
-            if not account:
-                continue    
-            pilot_id = account.get("id")
-            if not pilot_id:
+        self._log_upload_summary(successful_updates, check_only, log_callback)
+        self._report_run("compare" if check_only else "upload", successful_updates, log_callback)
+
+        return self._upload_result_message(successful_updates, check_only)
+
+    def compare(self, cancel_event=None, as_of=None, skip=(), revalidate=False, log_callback=lambda msg, tag=None: None, full_resync=False):
+        """
+        build_plan, against the state mirror when offline_compare is on and the mirror can answer.
+        With revalidate (a plan about to be uploaded), the pilots the offline plan would change are
+        then compared again with the server, unless offline_revalidate is off.
+        In delta mode (delta_sync or load_previous_export), members whose rows haven't changed are
+        left out, unless full_resync.
+        """
+        self.skipped_in_sync = self._delta_skip(as_of, full_resync, log_callback)
+        skip = set(skip) | self.skipped_in_sync
+        if not self._can_compare_offline():
+            plan = self.build_plan(cancel_event, as_of, skip)
+        else:
+            plan = self.build_plan(cancel_event, as_of, skip, offline=True)
+            log_callback(f"Compared with the local copy of Gliding App data from {self._mirror().accounts_read_at()}.", "info")
+            if revalidate and self.config.get("offline_revalidate", True):
+                return self._revalidate(plan, cancel_event, log_callback, skip)
+        self._compared_plan = plan
+        return plan
+
+    def _revalidate(self, plan, cancel_event, log_callback, skip=()):
+        """Compares the pilots an offline plan would change again with the server; returns the live plan."""
+        changed = {str(pilot_plan.membership) for pilot_plan in plan.pilots if pilot_plan.operations}
+        log_callback(f"Re-checking the {len(changed)} pilots with changes against Gliding App.", "info")
+        unchanged = {str(membership) for _, membership, _ in self.pilots} - changed - set(skip)
+        self.skipped_in_sync |= unchanged
+        self._compared_plan = self.build_plan(cancel_event, plan.as_of, set(skip) | unchanged)
+        return self._compared_plan
+
+    @profiled("build_plan")
+    def build_plan(self, cancel_event=None, as_of=None, skip=(), offline=False):
+        """
+        Compares every pilot's rows with the server and returns the SyncPlan; writes nothing.
+        Date rules are evaluated as of today, or as_of to see what a sync would do on that date.
+        Pilots whose membership (as a string) is in skip are left out without any request.
+        offline compares with the state mirror instead (pilots it has never seen are read live);
+        a live comparison downloads the account list again, as its plan drives writes, and
+        refreshes the mirror.
+        """
+        self.mapping_table = MappingTable(self.mappings)  # predefined values are evaluated once per run
+        self.rules = RulesEngine(as_of)
+        if offline:
+            with self.metrics.phase("read_mirror"):
+                mirror = self._mirror()
+                self.account_map = mirror.accounts_map()
+                self.pilot_competencies = mirror.pilot_competencies()
+        else:
+            self._project_accounts()
+            with self.metrics.phase("prefetch_competencies"):
+                self.prefetch_pilot_competencies(cancel_event, skip)
+            self._refresh_mirror()
+        plan = SyncPlan(as_of=self.rules.as_of, offline=offline)
+        self.compared_members = set()
+        with self.metrics.phase("plan"):
+            for name, membership, _ in self.pilots:
+                if cancel_event and cancel_event.is_set():
+                    raise CancelledByUserError("Operation cancelled by user.")
+                if str(membership) in skip:
+                    continue
+                pilot_plan = self._plan_pilot(name, membership, cancel_event)
+                if pilot_plan is None:
+                    continue
+                self.compared_members.add(str(membership))
+                if pilot_plan.operations or pilot_plan.notes:
+                    plan.pilots.append(pilot_plan)
+        return plan
+
+    def execute_plan(self, plan, check_only=False, log_callback=lambda msg, tag=None: None, cancel_event=None, journal=None):
+        """
+        Logs (check_only) or performs the plan's operations, returns the number of updates.
+        With a SyncJournal, pilots and operations it has as done are skipped and progress is recorded.
+        """
+        def work(pilot_plan, log):
+            if journal and journal.is_pilot_done(pilot_plan.membership):
+                return 0
+            return self._execute_pilot_plan(pilot_plan, check_only, log, cancel_event, journal)
+
+        if not check_only:
+            self._mirror()  # opened here, not by the first worker that writes to it
+            self._failed_pilots = set()
+        workers = int(self.config.get("upload_concurrency", 1))
+        with self.metrics.phase("compare" if check_only else "upload"):
+            if not check_only and self.config.get("async_upload", False):
+                return run_cancellable(self._execute_plan_async(plan, log_callback, cancel_event, journal), cancel_event)
+            if workers > 1:
+                return self._run_pilots_concurrently(workers, plan.pilots, work, log_callback, cancel_event)
+
+            successful_updates = 0
+            for pilot_plan in plan.pilots:
+                if cancel_event and cancel_event.is_set():
+                    raise CancelledByUserError("Operation cancelled by user.")
+                successful_updates += work(pilot_plan, log_callback)
+            return successful_updates
+
+    async def _execute_plan_async(self, plan, log_callback, cancel_event=None, journal=None):
+        """
+        The upload half of execute_plan on one asyncio event loop (async_upload): every pilot is a
+        task, with at most upload_concurrency pilots talking to the server at once.
+        """
+        from async_api_client import AsyncApiClient
+
+        semaphore = asyncio.Semaphore(max(int(self.config.get("upload_concurrency", 1)), 1))
+        async with AsyncApiClient(self.config, self.metrics, self.api.rate_limiter) as api:
+            async def run(pilot_plan):
+                records = []
+                buffered_log = lambda msg, tag=None: records.append((msg, tag))
+                async with semaphore:
+                    if cancel_event and cancel_event.is_set():
+                        raise CancelledByUserError("Operation cancelled by user.")
+                    if journal and journal.is_pilot_done(pilot_plan.membership):
+                        return 0, records
+                    count = await self._execute_pilot_plan_async(api, pilot_plan, buffered_log, cancel_event, journal)
+                return count, records
+
+            tasks = [asyncio.create_task(run(pilot_plan)) for pilot_plan in plan.pilots]
+            successful_updates = 0
+            try:
+                # awaiting in pilot order keeps the log in the same order as the serial path
+                for task in tasks:
+                    count, records = await task
+                    for msg, tag in records:
+                        log_callback(msg, tag)
+                    successful_updates += count
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        return successful_updates
+
+    def save_plan(self, path):
+        self.last_plan.save(path)
+
+    def load_plan(self, path):
+        self.last_plan = SyncPlan.load(path)
+        return self.last_plan
+
+    def prefetch_pilot_competencies(self, cancel_event=None, skip=()):
+        """
+        Reads the assigned competencies of every pilot who has rows for a mapped competency,
+        in parallel, before any diffing starts. Pilots with nothing to compare cost no request,
+        nor do those whose membership (as a string) is in skip.
+        """
+        pilot_ids = []
+        for _, membership, _ in self.pilots:
+            if str(membership) in skip:
                 continue
+            context = self._pilot_upload_context(membership)
+            if context and self._has_competency_rows(context[2]):
+                pilot_ids.append(context[0])
 
-            matching_rows = [
-                r for r in self.excel_loader.rows
-                if str(r["membership"]) == str(membership)
-            ]
-            if not matching_rows:
-                continue        
+        def fetch(pilot_id):
+            if cancel_event and cancel_event.is_set():
+                raise CancelledByUserError("Operation cancelled by user.")
+            return self.api.get_competencies_by_pilot(pilot_id)
 
-            successful_updates += self._upload_account_data(pilot_id, name, matching_rows, account.get("data", {}), check_only, log_callback, cancel_event)
-            successful_updates += self._upload_competencies_data(pilot_id, name, matching_rows, check_only, log_callback, cancel_event)
+        workers = max(int(self.config.get("upload_concurrency", 1)), 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(pilot_id, executor.submit(fetch, pilot_id)) for pilot_id in pilot_ids]
+            try:
+                self.pilot_competencies = {pilot_id: future.result() for pilot_id, future in futures}
+            except Exception:
+                for _, future in futures:
+                    future.cancel()
+                raise
 
+    @staticmethod
+    def _log_upload_summary(successful_updates, check_only, log_callback):
         if check_only:
             log_callback("Check-only mode: no data was changed.", "info")
         elif successful_updates > 0:
@@ -126,103 +377,466 @@ class SyncService:
         else:
             log_callback("Data was already up to date, nothing changed.", "info")
 
-        # reload accounts only if we updated something
-        if not check_only and successful_updates > 0:
-            self.account_map = self.api.fetch_accounts_map()
-        
+    def _report_run(self, mode, successful_updates, log_callback):
+        """Writes the JSON run report (unless run_report is off), logs the timing line and starts a new report."""
+        report_path = None
+        if self.config.get("run_report", True):
+            directory = self.config.get("run_report_dir") or app_config.app_path("run_reports")
+            try:
+                report_path = self.metrics.write_report(directory, {
+                    "mode": mode,
+                    "pilots": len(self.pilots),
+                    "updates": successful_updates,
+                    "upload_concurrency": int(self.config.get("upload_concurrency", 1)),
+                })
+            except OSError as e:
+                log_callback(f"Could not write the run report: {e}", "warning")
+        summary = self.metrics.summary()
+        log_callback(f"{summary} (report: {report_path})" if report_path else summary, "info")
+        self.metrics.reset()
+
+    @staticmethod
+    def _upload_result_message(successful_updates, check_only):
         return f"{'Compared' if check_only else 'Upload completed'}: {successful_updates} items {'would be' if check_only else 'were'} updated"
 
-    def _upload_competencies_data(self, pilot_id, name, matching_rows, check_only, log_callback, cancel_event=None):
+    def _run_pilots_concurrently(self, workers, items, work, log_callback, cancel_event=None):
+        """
+        Runs work(item, log) for every item on a bounded thread pool.
+        Each item logs into its own buffer, and buffers are replayed in item order,
+        so the log reads exactly as it would in the serial path.
+        """
+        def run(item):
+            records = []
+            buffered_log = lambda msg, tag=None: records.append((msg, tag))
+            try:
+                if cancel_event and cancel_event.is_set():
+                    raise CancelledByUserError("Operation cancelled by user.")
+                return work(item, buffered_log), records, None
+            except Exception as e:
+                return 0, records, e
+
+        successful_updates = 0
+        error = None
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run, item) for item in items]
+            for i, future in enumerate(futures):
+                count, records, error = future.result()
+                for msg, tag in records:
+                    log_callback(msg, tag)
+                successful_updates += count
+                if error is not None:
+                    break
+            if error is not None:
+                # stop queued items, then report whatever the running ones managed to do
+                for future in futures[i + 1:]:
+                    future.cancel()
+                for future in futures[i + 1:]:
+                    if future.cancelled():
+                        continue
+                    _, records, _ = future.result()
+                    for msg, tag in records:
+                        log_callback(msg, tag)
+                raise error
+        return successful_updates
+
+    def _pilot_upload_context(self, membership):
+        """Returns (pilot_id, account_data, rows_by_type) or None when there is nothing to sync."""
+        try:
+            account = self.account_map.get(int(membership))
+        except ValueError:
+            return None
+        if not account:
+            return None
+        pilot_id = account.get("id")
+        if not pilot_id:
+            return None
+
+        rows_by_type = self.excel_loader.rows_for_member(membership)
+        if not rows_by_type:
+            return None
+        # setdefault so successful writes can be merged back into account_map
+        return pilot_id, account.setdefault("data", {}), rows_by_type
+
+    def _plan_pilot(self, name, membership, cancel_event=None):
+        """
+        Computes the PilotPlan for one pilot, or None when the pilot can't be synced.
+        The pilot's competencies are the prefetched ones (or fetched when not prefetched).
+        """
+        context = self._pilot_upload_context(membership)
+        if context is None:
+            return None
+        pilot_id, account_data, rows_by_type = context
+
+        notes = []
+        note = lambda msg, tag=None: notes.append((msg, tag))
+        operations = []
+
+        updates = self._compute_account_updates(name, rows_by_type, account_data, note, cancel_event)
+        if updates:
+            before = {field: account_data.get(field) for field in updates}
+            operations.append(PlanOperation("put", before=before, after=updates))
+
+        if self._has_competency_rows(rows_by_type):
+            current_competencies = self.pilot_competencies.get(pilot_id)
+            if current_competencies is None:  # not prefetched, e.g. a pilot the state mirror hasn't seen
+                current_competencies = self.api.get_competencies_by_pilot(pilot_id)
+            for action, competency, date_from, date_to in self._competency_actions(rows_by_type, current_competencies, cancel_event):
+                current_comp = current_competencies.get(competency.id)
+                before = {"date_assigned": current_comp.date_assigned, "date_valid_to": current_comp.date_valid_to} if current_comp else None
+                after = {"date_assigned": date_from, "date_valid_to": date_to} if action == "assign" else None
+                operations.append(PlanOperation(action, competency, before, after))
+
+        return PilotPlan(pilot_id, name, membership, operations, notes)
+
+    def _execute_pilot_plan(self, pilot_plan, check_only, log_callback, cancel_event=None, journal=None):
+        for msg, tag in pilot_plan.notes:
+            log_callback(msg, tag)
+
+        if check_only:
+            return sum(self._log_operation_check(pilot_plan, op, log_callback) for op in pilot_plan.operations)
+
         successful_updates = 0
-        pilot_current_competencies = None
-        for excel_value_type, competency in self.mappings:
+        failed = False
+        for op in self._operations_to_send(pilot_plan, journal):
             if cancel_event and cancel_event.is_set():
                 raise CancelledByUserError("Operation cancelled by user.")
-            if not isinstance(competency, Competency):
-                continue
+            try:
+                response = self._send_operation(self.api, pilot_plan, op, journal)
+                successful_updates += self._operation_sent(pilot_plan, op, response, log_callback, journal)
+            except Exception as e:
+                failed = True
+                self._log_operation_failure(pilot_plan, op, e, log_callback)
+        self._pilot_sent(pilot_plan, failed, journal)
+        return successful_updates
 
-            if pilot_current_competencies is None:
-                pilot_current_competencies = self.api.get_competencies_by_pilot(pilot_id)
+    async def _execute_pilot_plan_async(self, api, pilot_plan, log_callback, cancel_event=None, journal=None):
+        """_execute_pilot_plan for an upload through AsyncApiClient."""
+        for msg, tag in pilot_plan.notes:
+            log_callback(msg, tag)
 
-            row_type = excel_value_type # This was already unsplit
-            row = next((r for r in matching_rows if r["type"] == row_type), None)
-            if row is None:
+        successful_updates = 0
+        failed = False
+        for op in self._operations_to_send(pilot_plan, journal):
+            if cancel_event and cancel_event.is_set():
+                raise CancelledByUserError("Operation cancelled by user.")
+            try:
+                response = await self._send_operation(api, pilot_plan, op, journal)
+                successful_updates += self._operation_sent(pilot_plan, op, response, log_callback, journal)
+            except Exception as e:
+                failed = True
+                self._log_operation_failure(pilot_plan, op, e, log_callback)
+        self._pilot_sent(pilot_plan, failed, journal)
+        return successful_updates
+
+    @staticmethod
+    def _operations_to_send(pilot_plan, journal):
+        """The pilot's operations, without those a resumed upload's journal has as done."""
+        if journal is None:
+            return pilot_plan.operations
+        return [op for op in pilot_plan.operations if not journal.is_operation_done(pilot_plan.membership, op)]
+
+    @staticmethod
+    def _send_operation(api, pilot_plan, op, journal):
+        """Journals op as started and sends it; returns the response (a coroutine of it with AsyncApiClient)."""
+        if journal:
+            journal.operation_started(pilot_plan.membership, op)
+        if op.action == "put":
+            return api.put_account_data(pilot_plan.pilot_id, op.after)
+        if op.action == "assign":
+            return api.assign_competency(pilot_plan.pilot_id, op.competency.id, op.after["date_assigned"], op.after["date_valid_to"])
+        return api.revoke_competency(pilot_plan.pilot_id, op.competency.id)
+
+    def _operation_sent(self, pilot_plan, op, response, log_callback, journal):
+        """Records a confirmed write in the journal, account_map and mirror; returns the update count."""
+        if journal:
+            journal.operation_done(pilot_plan.membership, op)
+        count = self._log_operation_success(pilot_plan, op, response, log_callback)
+        self._mirror_operation(pilot_plan, op)
+        return count
+
+    def _pilot_sent(self, pilot_plan, failed, journal):
+        if failed:
+            self._failed_pilots.add(str(pilot_plan.membership))
+        elif journal:
+            journal.pilot_done(pilot_plan.membership)
+
+    @staticmethod
+    def _log_operation_check(pilot_plan, op, log_callback):
+        name = pilot_plan.name
+        if op.action == "put":
+            log_callback(f"Compared Pilot {name} - would update fields: {op.after}", "info")
+            return len(op.after)
+        if op.action == "assign":
+            log_callback(f"Would assign: {op.competency.name} to {name}", "info")
+        else:
+            log_callback(f"Would revoke: {op.competency.name} from {name}", "info")
+        return 1
+
+    def _log_operation_success(self, pilot_plan, op, response, log_callback):
+        name = pilot_plan.name
+        if op.action == "put":
+            account = self.account_map.get(int(pilot_plan.membership))
+            if account is not None:
+                self._apply_account_update(account.setdefault("data", {}), op.after, response)
+            log_callback(f"Uploaded account data for pilot {name}: {op.after}", "success")
+            return 1 # one successful update operation for this pilot
+        if op.action == "assign":
+            log_callback(f"Assigned competency to pilot {name}: {op.competency.name}", "success")
+        else:
+            log_callback(f"Revoked competency from pilot {name}: {op.competency.name}", "warning")
+        return 1
+
+    @staticmethod
+    def _log_operation_failure(pilot_plan, op, error, log_callback):
+        name = pilot_plan.name
+        if op.action == "put":
+            log_callback(f"Failed to upload account data for pilot {name}", "error")
+            log_callback(f"  attempted updates: {op.after}", "error")
+            log_callback(f"  error: {error}", "error")
+        elif op.action == "assign":
+            log_callback(f"Failed to assign competency {op.competency.name} to pilot {name}: {error}", "error")
+        else:
+            log_callback(f"Failed to revoke competency {op.competency.name} from pilot {name}: {error}", "error")
+
+    def _open_journal(self, plan, log_callback):
+        """
+        The SyncJournal for this upload, keyed by the export's content hash (or the plan's, for a
+        plan loaded from a file) and the mappings; None when journaling is off or nothing is loaded.
+        """
+        if not self.config.get("sync_journal", True):
+            return None
+        export_hash = self.excel_loader.source_hash
+        if export_hash is None:
+            if plan is None:
+                return None
+            export_hash = hashlib.sha256(json.dumps(plan.to_dict(), sort_keys=True).encode("utf-8")).hexdigest()
+        mapping_hash = self._mapping_hash()
+        directory = self.config.get("journal_dir") or app_config.app_path("journals")
+        max_age = self.config.get("journal_max_age_hours", 24)
+        journal = SyncJournal.open(directory, export_hash, mapping_hash, float(max_age) if max_age is not None else None)
+        if journal.done_pilots or journal.started_operations:
+            log_callback(
+                f"Resuming an interrupted upload: skipping {len(journal.done_pilots)} pilots already done, "
+                f"redoing {journal.unconfirmed_operations()} unconfirmed updates.",
+                "info",
+            )
+        return journal
+
+    def _journaled_plan(self, journal, log_callback):
+        """
+        The plan an interrupted upload recorded in journal, to be continued without comparing again;
+        None if there is none or it was planned for another day.
+        """
+        if journal is None or journal.plan is None or journal.plan.as_of != date.today():
+            return None
+        plan = journal.plan
+        if journal.compared_members is not None:  # so this upload can record the delta fingerprint
+            self.compared_members = set(journal.compared_members)
+            self.skipped_in_sync = set(journal.skipped_members)
+            self.rules = RulesEngine(plan.as_of)
+            self._compared_plan = plan
+        left = sum(1 for pilot_plan in plan.pilots if not journal.is_pilot_done(pilot_plan.membership))
+        log_callback(f"Continuing its plan without comparing again: {left} pilots left.", "info")
+        return plan
+
+    def _mapping_hash(self):
+        return hashlib.sha256(json.dumps(Serializer.to_list(self.mappings), sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _fingerprint_path(self):
+        return self.config.get("delta_fingerprint_path") or app_config.app_path("export_fingerprint.json")
+
+    def _delta_skip(self, as_of, full_resync, log_callback):
+        """
+        Memberships delta mode leaves out: those whose rows are the same as at the last upload (or
+        in the previous export) and whose dates didn't pass a rule boundary since. Empty when delta
+        mode is off, full_resync is set, or the baseline doesn't match this run.
+        """
+        if full_resync or not (self.delta_baseline or self.config.get("delta_sync", False)):
+            return set()
+        baseline = self.delta_baseline or ExportFingerprint.load(self._fingerprint_path())
+        as_of = as_of or date.today()
+        if baseline is None:
+            reason = "no earlier upload was recorded"
+        elif baseline.server not in (None, self.api.base_url):
+            reason = "the last upload went to another server"
+        elif baseline.mapping_hash not in (None, self._mapping_hash()):
+            reason = "the mappings changed since the last upload"
+        elif as_of < baseline.as_of:
+            reason = f"{as_of} is before the last upload ({baseline.as_of})"
+        else:
+            reason = None
+        if reason:
+            log_callback(f"Delta sync: {reason}, comparing every member.", "info")
+            return set()
+        member_hashes = self.excel_loader.member_hashes()
+        changed, dated = baseline.changed_members(member_hashes, self.excel_loader.rows_by_member, as_of)
+        skip = set(member_hashes) - changed - dated
+        log_callback(
+            f"Delta sync: {len(changed)} members changed and {len(dated)} have dates that took effect since "
+            f"{baseline.as_of}; skipping the other {len(skip)}.",
+            "info",
+        )
+        return skip
+
+    def _save_fingerprint(self, plan, journal, log_callback):
+        """
+        With delta_sync on, records the members this upload left in sync as the baseline of the
+        next delta run: those it compared (and uploaded without a failure, if they had changes),
+        and those it skipped as in sync.
+        """
+        if not self.config.get("delta_sync", False) or plan is not self._compared_plan or self.rules is None:
+            return  # e.g. a plan loaded from a file, which may come from another export
+        synced = (self.compared_members - self._failed_pilots) | self.skipped_in_sync
+        if journal:
+            synced |= journal.done_pilots
+        member_hashes = self.excel_loader.member_hashes()
+        fingerprint = ExportFingerprint(
+            {membership: member_hash for membership, member_hash in member_hashes.items() if membership in synced},
+            self.rules.as_of, self.api.base_url, self._mapping_hash(),
+        )
+        try:
+            fingerprint.save(self._fingerprint_path())
+        except OSError as e:
+            log_callback(f"Could not save the export fingerprint for delta sync: {e}", "warning")
+
+    def _mirror(self):
+        """The StateMirror for the configured server, or None when state_mirror is off (the default without offline_compare)."""
+        if self.state_mirror is None and self.config.get("state_mirror", self.config.get("offline_compare", False)):
+            path = self.config.get("state_mirror_path") or app_config.app_path("state_mirror.sqlite3")
+            self.state_mirror = StateMirror(path, self.api.base_url)
+        return self.state_mirror
+
+    def _can_compare_offline(self):
+        """offline_compare is on and the mirror holds every account field the mappings need."""
+        if not self.config.get("offline_compare", False):
+            return False
+        mirror = self._mirror()
+        if mirror is None or not mirror.has_accounts():
+            return False
+        fields = mirror.account_fields()
+        needed = self._mapping_table().account_field_names() | set(RulesEngine.ACCOUNT_FIELDS)
+        return fields is None or needed <= fields
+
+    def _refresh_mirror(self):
+        """Stores what a live comparison just read: all accounts and the prefetched competencies."""
+        mirror = self._mirror()
+        if mirror is None:
+            return
+        mirror.store_accounts(self.account_map, self.api.accounts_snapshot.fields)
+        mirror.store_pilot_competencies(self.pilot_competencies)
+
+    def _mirror_operation(self, pilot_plan, op):
+        """Applies a confirmed write to the mirror, so it keeps matching the server."""
+        mirror = self._mirror()
+        if mirror is None:
+            return
+        if op.action == "put":
+            account = self.account_map.get(int(pilot_plan.membership))
+            if account is not None:
+                mirror.store_account_data(pilot_plan.membership, pilot_plan.pilot_id, account.get("data", {}))
+        elif op.action == "assign":
+            mirror.store_assignment(pilot_plan.pilot_id, op.competency.id, op.after["date_assigned"], op.after["date_valid_to"])
+        else:
+            mirror.store_revocation(pilot_plan.pilot_id, op.competency.id)
+
+    def _mapping_table(self):
+        """The compiled mappings for the current run (compiled on demand if no run started one)."""
+        if self.mapping_table is None:
+            self.mapping_table = MappingTable(self.mappings)
+        return self.mapping_table
+
+    def _project_accounts(self):
+        """
+        Cuts the accounts down to the data fields this run's mappings and rules read, downloads
+        them again (the plan must not be built from a stale snapshot) and rebuilds account_map.
+        """
+        fields = self._mapping_table().account_field_names() | set(RulesEngine.ACCOUNT_FIELDS)
+        self.api.accounts_snapshot.project(fields)
+        with self.metrics.phase("fetch_accounts"):
+            self.account_map = self.api.fetch_accounts_map(refresh=True)
+
+    def _rules(self):
+        """The rules engine for the current run (as of today if no run started one)."""
+        if self.rules is None:
+            self.rules = RulesEngine()
+        return self.rules
+
+    def _has_competency_rows(self, rows_by_type):
+        return self._mapping_table().has_competency_rows(rows_by_type)
+
+    def _competency_actions(self, rows_by_type, pilot_current_competencies, cancel_event=None):
+        """
+        Compares the pilot's rows with the competencies currently assigned on the server and
+        yields ("assign" | "revoke", competency, date_from, date_to) for each change needed.
+        """
+        for row_type, competency in self._mapping_table().competencies:
+            if cancel_event and cancel_event.is_set():
+                raise CancelledByUserError("Operation cancelled by user.")
+
+            rows = rows_by_type.get(row_type)
+            if not rows:
                 continue
+            row = rows[0]
 
             date_from, date_to = row["date from"], row["date to"]
 
-            if should_assign_competency_based_on_dates(date_from, date_to):
+            if self._rules().should_assign(date_from, date_to):
                 current_comp = pilot_current_competencies.get(competency.id)
                 has_changed = not current_comp or current_comp.has_changed_compared_to_current(date_from, date_to)
-                
                 if has_changed:
-                    if check_only:
-                        log_callback(f"Would assign: {competency.name} to {name}", "info")
-                        successful_updates += 1
-                    else:
-                        try:
-                            self.api.assign_competency(pilot_id, competency.id, date_from, date_to)
-                            log_callback(f"Assigned competency to pilot {name}: {competency.name}", "success")
-                            successful_updates += 1
-                        except Exception as e:
-                            log_callback(f"Failed to assign competency {competency.name} to pilot {name}: {e}", "error")
+                    yield "assign", competency, date_from, date_to
             else: # should not be assigned
                 if competency.id in pilot_current_competencies:
-                    if check_only:
-                        log_callback(f"Would revoke: {competency.name} from {name}", "info")
-                        successful_updates += 1
-                    else:
-                        try:
-                            self.api.revoke_competency(pilot_id, competency.id)
-                            log_callback(f"Revoked competency from pilot {name}: {competency.name}", "warning")
-                            successful_updates += 1
-                        except Exception as e:
-                            log_callback(f"Failed to revoke competency {competency.name} from pilot {name}: {e}", "error")
-        return successful_updates
+                    yield "revoke", competency, date_from, date_to
 
-    def _upload_account_data(self, pilot_id, name, matching_rows, account_data, check_only, log_callback, cancel_event=None):
-        updates = {}
-        predefined_values_generators = {
-            "Current DateTime": lambda: datetime.now().astimezone().isoformat(),
-            "App Name (QualsSync)": lambda: config.APP_NAME
-        }
+    def _compute_account_updates(self, name, rows_by_type, account_data, log_callback, cancel_event=None):
+        """Returns the account fields that differ from the server, after the hardcoded rules."""
+        if cancel_event and cancel_event.is_set():
+            raise CancelledByUserError("Operation cancelled by user.")
 
-        for excel_value_type, full_key in self.mappings:
-            if cancel_event and cancel_event.is_set():
-                raise CancelledByUserError("Operation cancelled by user.")
-            if isinstance(full_key, Competency):
+        updates = {}
+        for row_type, row_subtype_from_to, field_name, predefined_value in self._mapping_table().account_fields:
+            if row_type is None:
+                if account_data.get(field_name) != predefined_value:
+                    updates[field_name] = predefined_value
                 continue
-
-            field_name = full_key.split(" / ", 1)[1]
-            
-            if excel_value_type in predefined_values_generators:
-                new_value = predefined_values_generators[excel_value_type]()
-                if account_data.get(field_name) != new_value:
+            for r in rows_by_type.get(row_type, ()):
+                new_value = r.get(row_subtype_from_to)
+                if new_value is not None and account_data.get(field_name) != new_value:
                     updates[field_name] = new_value
-            else:
-                row_type = excel_value_type.split(" / ", 1)[0]
-                row_subtype_from_to = excel_value_type.split(" / ", 1)[1]
-                for r in matching_rows:
-                    if r["type"] != row_type:
-                        continue
-                    new_value = r.get(row_subtype_from_to)
-                    if new_value is not None and account_data.get(field_name) != new_value:
-                        updates[field_name] = new_value
 
-        apply_medical_check_rule(updates, account_data, name, log_callback)
+        self._rules().apply_medical_check_rule(updates, account_data, name, log_callback)
+        return updates
 
-        if updates:
-            if check_only:
-                log_callback(f"Compared Pilot {name} - would update fields: {updates}", "info")
-                return len(updates)
-            else:
+    @staticmethod
+    def _apply_account_update(account_data, updates, response):
+        """
+        Merges a successful PUT into our copy of the account (shared with the accounts snapshot),
+        instead of re-downloading every account. The server's echo of a field wins over what we sent.
+        """
+        echoed = response.get("data") if isinstance(response, dict) else None
+        if not isinstance(echoed, dict):
+            echoed = {}
+        for field, value in updates.items():
+            account_data[field] = echoed.get(field, value)
+
+
+def run_cancellable(coro, cancel_event=None, poll_interval=0.1):
+    """
+    Runs a coroutine on a fresh event loop from a worker thread. Setting cancel_event cancels
+    the task, which surfaces as CancelledByUserError just like the threaded code paths.
+    """
+    async def runner():
+        task = asyncio.ensure_future(coro)
+        while not task.done():
+            if cancel_event and cancel_event.is_set():
+                task.cancel()
                 try:
-                    self.api.put_account_data(pilot_id, updates)
-                    log_callback(f"Uploaded account data for pilot {name}: {updates}", "success")
-                    return 1 # one successful update operation for this pilot
-                except Exception as e:
-                    log_callback(f"Failed to upload account data for pilot {name}", "error")
-                    log_callback(f"  attempted updates: {updates}", "error")
-                    log_callback(f"  error: {e}", "error")
-                    return 0
-        return 0
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                raise CancelledByUserError("Operation cancelled by user.")
+            await asyncio.wait({task}, timeout=poll_interval)
+        return task.result()
+
+    return asyncio.run(runner())
@@ -0,0 +1,50 @@
+from competency import Competency
+
+
+class TargetTreeIndex:
+    """
+    Flat index over the target tree dict (as returned by SyncService.load_target_tree), so the
+    GUI can search thousands of fields and competencies without walking the Treeview.
+    Every leaf is stored with its path from the root; a search matches leaves whose full path
+    contains all the words of the query, case-insensitively.
+    """
+
+    def __init__(self, tree):
+        # (path of labels from the root to the leaf, Competency or None)
+        self.leaves: list[tuple[tuple[str, ...], Competency | None]] = []
+        self._keys: list[str] = []
+        self._add(tree, ())
+
+    def search(self, query, limit=None):
+        words = query.lower().split()
+        matches = []
+        for key, leaf in zip(self._keys, self.leaves):
+            if all(word in key for word in words):
+                matches.append(leaf)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    def __len__(self):
+        return len(self.leaves)
+
+    def _add(self, node, path):
+        if not node:
+            # the tree view shows a key without children as a leaf of its own
+            if path:
+                self._add_leaf(path, None)
+        elif isinstance(node, dict):
+            for label, child in node.items():
+                self._add(child, path + (label,))
+        elif isinstance(node, list):
+            for item in node:
+                if isinstance(item, Competency):
+                    self._add_leaf(path + (item.name,), item)
+                else:
+                    self._add_leaf(path + (str(item),), None)
+        else:
+            self._add_leaf(path + (str(node),), None)
+
+    def _add_leaf(self, path, competency):
+        self.leaves.append((path, competency))
+        self._keys.append(" / ".join(path).lower())
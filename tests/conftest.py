@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+import config
+
+
+@pytest.fixture(autouse=True)
+def config_in_tmp_path(tmp_path, monkeypatch):
+    """Folders that default to "next to config.json" (journals, reports, mirror...) land in tmp_path."""
+    monkeypatch.setattr(config, "CONFIG_FILE", str(tmp_path / "config.json"))
+
+
+@pytest.fixture
+def club():
+    """A 30-pilot mock Gliding App on a local port; yields (app, url)."""
+    pytest.importorskip("requests")
+    import mock_server
+
+    app = mock_server.MockGlidingApp(pilots=30)
+    server = mock_server.start(app)
+    yield app, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def server_state(club):
+    """Returns a function snapshotting the mock club's account data and assigned competencies."""
+    app, _ = club
+
+    def snapshot():
+        # medical_checked_at is stamped with the upload time, so it differs between runs
+        return (
+            {pilot_id: {k: v for k, v in account["data"].items() if k != "medical_checked_at"}
+             for pilot_id, account in app.accounts.items()},
+            {pilot_id: sorted(assigned) for pilot_id, assigned in app.assigned.items()},
+        )
+
+    return snapshot
+
+
+@pytest.fixture
+def journals():
+    """Returns a function listing the sync journals left next to config.json."""
+    def list_journals():
+        directory = config.app_path("journals")
+        return os.listdir(directory) if os.path.isdir(directory) else []
+
+    return list_journals
+
+
+@pytest.fixture
+def export(tmp_path):
+    """An Aerolog-style export of the mock club's members; returns its path."""
+    pytest.importorskip("openpyxl")
+    pytest.importorskip("dateutil")
+    import bench_sync
+    import mock_server
+
+    path = str(tmp_path / "export.xlsx")
+    bench_sync.write_export(path, 30, mock_server.DEFAULT_MAPPINGS)
+    return path
+
+
+@pytest.fixture
+def make_service(club, export):
+    """Returns a factory for a SyncService on the mock club with the export and live mappings loaded."""
+    import mock_server
+    from sync_service import SyncService
+
+    _, url = club
+
+    def make(path=export, **settings):
+        service = SyncService({
+            "server": url, "api_key": "test", "excel_cache": False, "excel_streaming": True,
+            "run_report": False, **settings,
+        })
+        service.load_mappings(mock_server.DEFAULT_MAPPINGS)
+        service.load_excel_data(path)
+        return service
+
+    return make
@@ -0,0 +1,27 @@
+from accounts_snapshot import AccountsSnapshot
+
+
+def test_snapshot_is_reused_until_invalidated():
+    downloads = []
+    snapshot = AccountsSnapshot(lambda: downloads.append(1) or [{"id": 1, "data": {"a": 1}}])
+    snapshot.get()
+    snapshot.get()
+    assert len(downloads) == 1
+    snapshot.invalidate()
+    snapshot.get()
+    assert len(downloads) == 2
+
+
+def test_live_compare_sees_account_changes_made_since_the_last_download(club, make_service):
+    app, _ = club
+    service = make_service()
+    service.upload_data(False)
+    for account in app.accounts.values():
+        account["data"]["medical_valid_from"] = None
+        account["data"]["medical_valid_to"] = None
+    app.requests.clear()
+
+    service.upload_data(True)
+
+    assert app.requests["GET /api/accounts.json"] == 1
+    assert any(op.action == "put" for pilot_plan in service.last_plan.pilots for op in pilot_plan.operations)
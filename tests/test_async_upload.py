@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("aiohttp")
+
+
+def test_async_upload_matches_threaded_upload(club, make_service, server_state, journals):
+    app, _ = club
+    make_service(upload_concurrency=4).upload_data(False)
+    expected = server_state()
+    app.reset()
+
+    service = make_service(async_upload=True, upload_concurrency=4)
+    service.upload_data(True)
+    assert service.last_plan.pilots
+    service.upload_data(False, plan=service.last_plan)
+
+    assert server_state() == expected
+    assert journals() == []
+    assert service.last_plan is None
+
+
+def test_async_upload_shares_the_rate_limiter(make_service, monkeypatch):
+    service = make_service(async_upload=True, upload_concurrency=4, http_max_rps=1000)
+    service.upload_data(True)
+    plan = service.last_plan
+    limiter = service.api.rate_limiter
+    methods = []
+    request_async = limiter.request_async
+
+    def spy(method, url):
+        methods.append(method)
+        return request_async(method, url)
+
+    monkeypatch.setattr(limiter, "request_async", spy)
+    service.upload_data(False, plan=plan)
+
+    assert len(methods) == sum(len(pilot_plan.operations) for pilot_plan in plan.pilots)
+    assert set(methods) <= {"PUT", "POST"}
+    assert limiter.limits["write"].in_flight == 0
@@ -0,0 +1,55 @@
+import json
+import threading
+from datetime import date
+
+import pytest
+
+import cli
+import config
+from sync_plan import SyncPlan
+from sync_service import CancelledByUserError, SyncService
+
+
+def test_as_of_is_rejected_with_apply(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["export.xlsx", "--mappings", "mappings.json", "--as-of", "2030-01-01", "--apply"])
+
+    assert exit_info.value.code == 2
+    assert "--as-of" in capsys.readouterr().err
+
+
+def test_plan_for_another_day_is_not_uploaded():
+    service = SyncService({"server": "http://127.0.0.1:9", "api_key": "test"})
+
+    with pytest.raises(ValueError):
+        service.upload_data(False, plan=SyncPlan(as_of=date(2030, 1, 1)))
+    with pytest.raises(ValueError):
+        service.upload_data(False, as_of=date(2030, 1, 1))
+
+
+def test_apply_continues_an_interrupted_upload(club, make_service, export, journals, monkeypatch):
+    import mock_server
+
+    monkeypatch.setattr(cli.signal, "signal", lambda *args: None)  # keep pytest's Ctrl+C handler
+
+    app, url = club
+    cancel_event = threading.Event()
+    uploaded = []
+
+    def log(message, tag=None):
+        if tag == "success":
+            uploaded.append(message)
+            if len(uploaded) == 10:
+                cancel_event.set()
+
+    with pytest.raises(CancelledByUserError):
+        make_service().upload_data(False, log, cancel_event)
+    with open(config.CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump({"server": url, "api_key": "test", "excel_cache": False, "run_report": False}, f)
+    app.requests.clear()
+
+    exit_code = cli.main([export, "--mappings", mock_server.DEFAULT_MAPPINGS, "--config", config.CONFIG_FILE, "--apply", "--quiet"])
+
+    assert exit_code == cli.EXIT_OK
+    assert app.requests["GET /api/competencies/user.json"] == 0
+    assert journals() == []
@@ -0,0 +1,70 @@
+from datetime import date
+
+from excel_row import ExcelRow
+from export_fingerprint import ExportFingerprint
+
+
+def _rows(*dates):
+    return {"SPL": [ExcelRow("1001", "Pilot 1001", "SPL", date_from, date_to) for date_from, date_to in dates]}
+
+
+def test_changed_rows_are_detected():
+    before = ExportFingerprint.hash_members({"1001": _rows(("2020-01-01", None)), "1002": _rows(("2021-01-01", None))})
+    after_rows = {"1001": _rows(("2020-01-01", None)), "1002": _rows(("2021-02-01", None)), "1003": _rows()}
+    fingerprint = ExportFingerprint(before, date(2026, 1, 1))
+
+    changed, dated = fingerprint.changed_members(ExportFingerprint.hash_members(after_rows), after_rows, date(2026, 1, 1))
+
+    assert changed == {"1002", "1003"}
+    assert dated == set()
+
+
+def test_dates_that_took_effect_are_compared_again():
+    rows = {
+        "1001": _rows(("2026-01-10", None)),  # becomes valid
+        "1002": _rows(("2020-01-01", "2026-01-05")),  # valid through the 5th, expired on the 6th
+        "1003": _rows(("2020-01-01", "2026-02-01")),  # still valid
+        "1004": _rows(("2026-01-01", None)),  # valid since the fingerprint's day
+    }
+    fingerprint = ExportFingerprint(ExportFingerprint.hash_members(rows), date(2026, 1, 1))
+
+    changed, dated = fingerprint.changed_members(ExportFingerprint.hash_members(rows), rows, date(2026, 1, 10))
+
+    assert changed == set()
+    assert dated == {"1001", "1002"}
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "fingerprint.json")
+    ExportFingerprint({"1001": "abc"}, date(2026, 1, 1), "http://server", "mappings").save(path)
+
+    loaded = ExportFingerprint.load(path)
+
+    assert (loaded.member_hashes, loaded.as_of, loaded.server, loaded.mapping_hash) == (
+        {"1001": "abc"}, date(2026, 1, 1), "http://server", "mappings")
+    assert ExportFingerprint.load(str(tmp_path / "missing.json")) is None
+
+
+def test_second_upload_compares_nobody(club, make_service):
+    app, _ = club
+    make_service(delta_sync=True).upload_data(False)
+    app.requests.clear()
+
+    service = make_service(delta_sync=True)
+    logs = []
+    service.upload_data(False, lambda msg, tag=None: logs.append(msg))
+
+    assert service.compared_members == set()
+    assert len(service.skipped_in_sync) == 30
+    assert "GET /api/competencies/user.json" not in app.requests
+    assert any(msg.startswith("Delta sync: 0 members changed") for msg in logs)
+
+
+def test_full_resync_compares_everybody(club, make_service):
+    make_service(delta_sync=True).upload_data(False)
+
+    service = make_service(delta_sync=True)
+    service.upload_data(True, full_resync=True)
+
+    assert service.skipped_in_sync == set()
+    assert len(service.compared_members) == 30
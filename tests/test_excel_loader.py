@@ -0,0 +1,81 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from excel_loader import ExcelLoader
+
+pd = pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("dateutil")
+
+
+def _write_mixed_export(path, members=60, seed=1):
+    """An export whose date cells mix datetimes, serial numbers, text dates, blanks and junk."""
+    rng = random.Random(seed)
+
+    def date_cell():
+        k = rng.random()
+        if k < 0.4:
+            return datetime(2015, 1, 1) + timedelta(days=rng.randint(0, 5000))
+        if k < 0.55:
+            return None
+        if k < 0.65:
+            return rng.randint(40000, 47000)
+        if k < 0.7:
+            return rng.randint(40000, 47000) + 0.5
+        if k < 0.8:
+            return f"{rng.randint(1, 28)}/{rng.randint(1, 12)}/20{rng.randint(10, 30)}"
+        if k < 0.85:
+            return f"20{rng.randint(10, 30)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}"
+        if k < 0.9:
+            return rng.choice(["garbage", " ", "31/02/2024", "1 Jan 2020", "N/A"])
+        return f"{rng.randint(1, 28)}.{rng.randint(1, 12)}.2021"
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for i in range(4):
+        sheet.append([f"Report header {i}"])
+    sheet.append(["ACCOUNT", "NAME", "TYPE", "X", "DATE FROM", "DATE TO"])
+    types = ["Medical", "SPL LM W", "SPL LM AT", "SPL FI(S) Seminar", "CGC SELF AUTH"]
+    for membership in range(1000, 1000 + members):
+        for row_type in rng.sample(types, rng.randint(1, 5)):
+            sheet.append([membership, f" Pilot {membership} ", f" {row_type}", "x", date_cell(), date_cell()])
+    workbook.save(path)
+
+
+def _iterrows_rows(path):
+    """The row-by-row DataFrame.iterrows loader _read_rows replaced, as the reference."""
+    df = pd.read_excel(path, sheet_name=0, engine="openpyxl", header=4)
+    return [
+        {
+            "membership": str(row["ACCOUNT"]).strip(),
+            "name": str(row["NAME"]).strip(),
+            "type": str(row.iloc[2]).strip(),
+            "date from": ExcelLoader._parse_excel_date(row.iloc[4]),
+            "date to": ExcelLoader._parse_excel_date(row.iloc[5]),
+        }
+        for _, row in df.iterrows()
+    ]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_column_wise_loader_matches_iterrows(tmp_path, seed):
+    path = str(tmp_path / "export.xlsx")
+    _write_mixed_export(path, seed=seed)
+
+    rows = ExcelLoader({})._read_rows(path)
+
+    assert rows == _iterrows_rows(path)
+
+
+def test_streaming_loader_indexes_the_same_members(tmp_path):
+    path = str(tmp_path / "export.xlsx")
+    _write_mixed_export(path)
+    pandas_loader = ExcelLoader({"excel_cache": False})
+    pandas_loader.load_excel(path)
+    streaming_loader = ExcelLoader({"excel_cache": False, "excel_streaming": True})
+    streaming_loader.load_excel(path)
+
+    assert streaming_loader.rows_by_member == pandas_loader.rows_by_member
+    assert streaming_loader.member_hashes() == pandas_loader.member_hashes()
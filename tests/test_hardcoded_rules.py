@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+
+from hardcoded_rules import RulesEngine
+
+AS_OF = date(2025, 6, 15)
+
+
+@pytest.fixture
+def rules():
+    return RulesEngine(AS_OF)
+
+
+@pytest.mark.parametrize("value_from, value_to, expected", [
+    (None, None, True),
+    ("2025-06-15", None, True),  # valid from the as-of date itself
+    ("2025-06-16", None, False),  # starts the day after
+    (None, "2025-06-15", True),  # still valid on its last day
+    (None, "2025-06-14", False),  # expired the day before
+    ("2025-06-15", "2025-06-15", True),
+    ("2025-01-01", "2026-01-01", True),
+    ("15/06/2025", None, False),
+    (None, "not a date", False),
+])
+def test_should_assign_boundaries(rules, value_from, value_to, expected):
+    assert rules.should_assign(value_from, value_to) is expected
+
+
+@pytest.mark.parametrize("valid_from, valid_to, expected", [
+    (None, None, False),  # no dates is not current, unlike should_assign
+    ("2025-06-15", None, True),
+    ("2025-06-16", None, False),
+    (None, "2025-06-15", True),
+    (None, "2025-06-14", False),
+    ("2025-13-01", "2026-01-01", False),
+])
+def test_is_medical_current_boundaries(rules, valid_from, valid_to, expected):
+    assert rules.is_medical_current(valid_from, valid_to) is expected
+
+
+def test_rules_use_the_as_of_date_not_today():
+    assert RulesEngine(date(2020, 1, 1)).should_assign(None, "2020-01-01")
+    assert not RulesEngine(date(2020, 1, 2)).should_assign(None, "2020-01-01")
+
+
+def test_invalid_dates_keep_failing_once_memoised(rules):
+    assert not rules.should_assign("garbage", None)
+    assert not rules.should_assign("garbage", None)
+    with pytest.raises(ValueError):
+        rules.parse_date("garbage")
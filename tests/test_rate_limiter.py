@@ -0,0 +1,165 @@
+import asyncio
+import threading
+
+import pytest
+
+import rate_limiter
+from rate_limiter import AdaptiveLimit, RateLimiter
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() advances monotonic() instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code, retried_statuses=()):
+        self.status_code = status_code
+        history = [type("Attempt", (), {"status": status})() for status in retried_statuses]
+        self.raw = type("Raw", (), {"retries": type("Retry", (), {"history": history})()})()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def _call(limit, latency=0.01, throttled=False):
+    limit.acquire()
+    limit.release(None if throttled else latency, throttled)
+
+
+def test_throttled_response_halves_the_window_once_per_round_trip(clock):
+    limit = AdaptiveLimit(8)
+    _call(limit, throttled=True)
+    assert limit.limit == 4
+    _call(limit, throttled=True)  # same round trip: already reacted
+    assert limit.limit == 4
+    clock.sleep(1.0)
+    _call(limit, throttled=True)
+    assert limit.limit == 2
+
+
+def test_healthy_responses_grow_the_window_up_to_the_maximum(clock):
+    limit = AdaptiveLimit(4)
+    _call(limit, throttled=True)
+    assert limit.limit == 2
+    _call(limit)
+    assert limit.limit == 2.5
+    for _ in range(20):
+        _call(limit)
+    assert limit.limit == 4
+
+
+def test_window_never_drops_below_one(clock):
+    limit = AdaptiveLimit(2)
+    for _ in range(5):
+        _call(limit, throttled=True)
+        clock.sleep(1.0)
+    assert limit.limit == 1
+
+
+def test_latency_well_above_usual_halves_the_window(clock):
+    limit = AdaptiveLimit(8, latency_tolerance=2.0)
+    for _ in range(10):
+        _call(limit, latency=0.01)
+    _call(limit, latency=1.0)
+    assert limit.limit == 4
+
+
+def test_non_adaptive_window_stays_put(clock):
+    limit = AdaptiveLimit(8, adaptive=False)
+    _call(limit, throttled=True)
+    assert limit.limit == 8
+
+
+def test_acquire_waits_for_a_free_slot():
+    limit = AdaptiveLimit(1)
+    limit.acquire()
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (limit.acquire(), acquired.set()))
+    thread.start()
+    assert not acquired.wait(0.05)
+    limit.release(0.01, False)
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_throttled_write_leaves_the_read_window_alone(clock):
+    limiter = RateLimiter(max_concurrency=8)
+    with limiter.request("PUT", "http://club/api/accounts.json") as call:
+        call.observe(FakeResponse(429))
+    assert limiter.limits["write"].limit == 4
+    assert limiter.limits["read"].limit == 8
+
+
+def test_retried_attempts_count_as_throttling(clock):
+    limiter = RateLimiter(max_concurrency=8)
+    with limiter.request("GET", "http://club/api/accounts.json") as call:
+        call.observe(FakeResponse(200, retried_statuses=(503,)))
+    assert (call.retried, call.throttled) == (1, 1)
+    assert limiter.limits["read"].limit == 4
+
+
+def test_failed_request_shrinks_the_window(clock):
+    limiter = RateLimiter(max_concurrency=8)
+    with pytest.raises(ConnectionError):
+        with limiter.request("GET", "http://club/api/accounts.json"):
+            raise ConnectionError()
+    assert limiter.limits["read"].limit == 4
+
+
+def test_max_rps_spaces_requests(clock):
+    limiter = RateLimiter(max_rps=20, max_concurrency=4)
+    start = clock.now
+    for _ in range(5):
+        with limiter.request("GET", "http://club/api/accounts.json") as call:
+            call.observe(FakeResponse(200))
+    assert clock.now - start == pytest.approx(4 / 20)
+
+
+def test_async_requests_share_the_window_and_rate():
+    limiter = RateLimiter(max_rps=100, max_concurrency=2)
+    in_flight = []
+    peak = 0
+
+    async def one():
+        nonlocal peak
+        async with limiter.request_async("GET", "http://club/api/competencies/user.json") as call:
+            in_flight.append(call)
+            peak = max(peak, len(in_flight))
+            await asyncio.sleep(0.01)
+            call.observe_status(200)
+            in_flight.remove(call)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(one() for _ in range(6)))
+        return loop.time() - start
+
+    elapsed = asyncio.run(main())
+    assert peak == 2
+    assert elapsed >= 5 / 100
+    assert limiter.limits["read"].in_flight == 0
+
+
+def test_async_throttled_attempt_halves_the_window():
+    limiter = RateLimiter(max_concurrency=8)
+
+    async def main():
+        async with limiter.request_async("POST", "http://club/api/competencies/assign.json") as call:
+            call.observe_status(429)
+
+    asyncio.run(main())
+    assert limiter.limits["write"].limit == 4
@@ -0,0 +1,24 @@
+import os
+
+import config
+
+
+def test_no_mirror_unless_offline_compare(make_service):
+    make_service().upload_data(True)
+
+    assert not os.path.exists(config.app_path("state_mirror.sqlite3"))
+
+
+def test_offline_compare_makes_no_requests(club, make_service):
+    app, _ = club
+    live = make_service(offline_compare=True)
+    live.upload_data(True)  # nothing mirrored yet: compares live and fills the mirror
+    app.requests.clear()
+
+    offline = make_service(offline_compare=True)
+    offline.upload_data(True)
+
+    assert offline.last_plan.offline
+    assert sum(app.requests.values()) == 0
+    assert [p.membership for p in offline.last_plan.pilots] == [p.membership for p in live.last_plan.pilots]
+    assert len(offline.last_plan) == len(live.last_plan)
@@ -0,0 +1,84 @@
+import threading
+from datetime import date
+
+import pytest
+
+from sync_journal import SyncJournal
+from sync_plan import SyncPlan, PilotPlan, PlanOperation
+from sync_service import CancelledByUserError
+
+
+def _writes(app):
+    return sum(count for endpoint, count in app.requests.items() if not endpoint.startswith("GET"))
+
+
+@pytest.mark.parametrize("async_upload", [False, True])
+def test_cancelled_upload_resumes(club, make_service, server_state, journals, async_upload):
+    if async_upload:
+        pytest.importorskip("aiohttp")
+    app, _ = club
+    make_service().upload_data(False)
+    expected = server_state()
+    writes = _writes(app)
+    app.reset()
+
+    cancel_event = threading.Event()
+    uploaded = []
+
+    def log(message, tag=None):
+        if tag == "success":
+            uploaded.append(message)
+            if len(uploaded) == 10:
+                cancel_event.set()
+
+    with pytest.raises(CancelledByUserError):
+        make_service(async_upload=async_upload).upload_data(False, log, cancel_event)
+    assert len(journals()) == 1
+    writes_before_cancel = _writes(app)
+
+    service = make_service(async_upload=async_upload)
+    app.requests.clear()
+    logs = []
+    service.upload_data(False, lambda msg, tag=None: logs.append(msg))
+
+    assert any(msg.startswith("Resuming an interrupted upload") for msg in logs)
+    assert not [endpoint for endpoint in app.requests if endpoint.startswith("GET")]  # nothing compared again
+    if not async_upload:  # async writes in flight at the cancel are redone
+        assert writes_before_cancel + _writes(app) == writes
+    assert server_state() == expected
+    assert journals() == []
+
+
+def test_completed_upload_with_failures_drops_the_journal(club, make_service, journals):
+    app, _ = club
+    service = make_service(http_retries=0)
+    service.upload_data(True)
+    failing = next(p for p in service.last_plan.pilots if any(op.action == "put" for op in p.operations))
+    del app.accounts[failing.pilot_id]  # its account update now fails with 404
+
+    errors = []
+    service.upload_data(False, lambda msg, tag=None: errors.append(msg) if tag == "error" else None, plan=service.last_plan)
+
+    assert errors
+    assert journals() == []
+
+
+def test_journal_keeps_the_plan_and_what_was_done(tmp_path):
+    op = PlanOperation("put", before={"medical_valid_from": None}, after={"medical_valid_from": "2024-01-01"})
+    plan = SyncPlan([PilotPlan(5, "Pilot 1005", 1005, [op]), PilotPlan(6, "Pilot 1006", 1006, [op])], as_of=date(2026, 1, 1))
+    journal = SyncJournal.open(str(tmp_path), "export", "mappings")
+    journal.plan_started(plan, {"1005", "1006", "1007"}, {"1008"})
+    journal.operation_started(1005, op)
+    journal.operation_done(1005, op)
+    journal.pilot_done(1005)
+    journal.operation_started(1006, op)
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"event": "done", "membe')  # torn by the interruption
+
+    resumed = SyncJournal.open(str(tmp_path), "export", "mappings")
+
+    assert resumed.plan.to_dict() == plan.to_dict()
+    assert (resumed.compared_members, resumed.skipped_members) == ({"1005", "1006", "1007"}, {"1008"})
+    assert resumed.done_pilots == {"1005"}
+    assert resumed.unconfirmed_operations() == 1
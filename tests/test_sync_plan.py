@@ -0,0 +1,76 @@
+from datetime import date
+
+import pytest
+
+from competency import Competency
+from sync_plan import SyncPlan, PilotPlan, PlanOperation
+
+
+def _plan():
+    competency = Competency("Passenger flying rating", "Competencies / Flying Privileges / Passenger flying rating", 376)
+    pilot = PilotPlan(5, "Pilot 1005", 1005, [
+        PlanOperation("put", before={"medical_valid_from": None}, after={"medical_valid_from": "2024-01-01"}),
+        PlanOperation("assign", competency, None, {"date_assigned": "2024-01-01", "date_valid_to": None}),
+        PlanOperation("revoke", competency, {"date_assigned": "2020-01-01", "date_valid_to": None}),
+    ], [("Skipping medical_checked_at", "warning")])
+    return SyncPlan([pilot], as_of=date(2026, 1, 1), offline=True)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "plan.json")
+    _plan().save(path)
+
+    loaded = SyncPlan.load(path)
+
+    assert loaded.to_dict() == _plan().to_dict()
+    assert loaded.as_of == date(2026, 1, 1) and loaded.offline
+    assert len(loaded) == 3
+    assert loaded.pilots[0].notes == [("Skipping medical_checked_at", "warning")]
+    assert loaded.pilots[0].operations[1].competency.id == 376
+
+
+def test_unknown_version_is_rejected():
+    with pytest.raises(ValueError):
+        SyncPlan.from_dict({"version": 99, "pilots": []})
+
+
+def test_compared_plan_is_dropped_when_inputs_change(make_service, export):
+    import mock_server
+
+    service = make_service()
+    service.upload_data(True)
+    assert service.last_plan is not None
+    service.load_mappings(mock_server.DEFAULT_MAPPINGS)
+    assert service.last_plan is None
+
+    service.upload_data(True)
+    service.load_excel_data(export)
+    assert service.last_plan is None
+
+    service.upload_data(True)
+    service.upload_data(False, plan=service.last_plan)
+    assert service.last_plan is None
+
+
+def test_offline_plan_is_revalidated_before_applying(club, make_service, tmp_path):
+    app, _ = club
+    make_service(state_mirror=True).upload_data(True)  # fills the mirror
+    service = make_service(state_mirror=True, offline_compare=True)
+    service.upload_data(True)
+    plan = service.last_plan
+    assert plan.offline
+    plan.save(str(tmp_path / "offline.json"))
+
+    # someone else assigns competencies on the server after the mirror was read
+    for pilot_plan in plan.pilots:
+        for op in pilot_plan.operations:
+            if op.action == "assign":
+                app.assigned[pilot_plan.pilot_id][op.competency.id] = {"competency_id": op.competency.id, **op.after}
+    app.requests.clear()
+    logs = []
+    service.upload_data(False, lambda msg, tag=None: logs.append(msg), plan=plan)
+
+    assert any(msg.startswith("Re-checking") for msg in logs)
+    assert "POST /api/competencies/assign.json" not in app.requests
+    with pytest.raises(ValueError):
+        service.upload_data(False, plan=SyncPlan.load(str(tmp_path / "offline.json")))